@@ -29,6 +29,9 @@ defmodule SnakeBridge.Bytes do
 
       {"__type__": "bytes", "__schema__": 1, "data": "<base64-encoded>"}
 
+  Python returns bytes without the per-tag `__schema__` key
+  (`{"__type__": "bytes", "data": "<base64-encoded>"}`); both forms decode.
+
   """
 
   @type t :: %__MODULE__{data: binary()}
@@ -19,8 +19,7 @@ defmodule SnakeBridge.Types do
       # Decoding JSON-compatible format back to Elixir
       iex> SnakeBridge.Types.decode(%{
       ...>   "__type__" => "tuple",
-      ...>   "__schema__" => 1,
-      ...>   "elements" => [%{"__type__" => "atom", "__schema__" => 1, "value" => "ok"}, 42]
+      ...>   "elements" => [%{"__type__" => "atom", "value" => "ok"}, 42]
       ...> })
       {:ok, 42}
 
@@ -31,6 +30,11 @@ defmodule SnakeBridge.Types do
   `SnakeBridge.Types.Decoder` for details on supported types and their
   representations.
 
+  Tagged values encoded on the Elixir side carry a per-tag `__schema__` key.
+  Tagged values coming back from Python do not; Python sends the schema
+  version once on the result envelope. Decoding ignores `__schema__` wherever
+  it appears.
+
   ## Round-trip Safety
 
   All encoded values can be round-tripped (atoms depend on the decode allowlist):
@@ -85,8 +89,7 @@ defmodule SnakeBridge.Types do
 
       iex> SnakeBridge.Types.decode(%{
       ...>   "__type__" => "tuple",
-      ...>   "__schema__" => 1,
-      ...>   "elements" => [%{"__type__" => "atom", "__schema__" => 1, "value" => "ok"}, 42]
+      ...>   "elements" => [%{"__type__" => "atom", "value" => "ok"}, 42]
       ...> })
       {:ok, 42}
 
@@ -23,6 +23,15 @@ defmodule SnakeBridge.Types.Decoder do
   - `{"__type__": "ref", ...}` → `SnakeBridge.Ref`
   - `{"__type__": "stream_ref", ...}` → `SnakeBridge.StreamRef`
 
+  The compact form emitted by the Python encoder with `SNAKEBRIDGE_COMPACT=true`
+  is also accepted: a list whose first element is `"\\u0000tuple"`,
+  `"\\u0000set"` or `"\\u0000frozenset"` followed by the elements, or
+  `"\\u0000bytes"`, `"\\u0000complex"`, `"\\u0000datetime"`, `"\\u0000date"`
+  or `"\\u0000time"` followed by the same fields as the tagged form. A scalar
+  marker list with the wrong arity or an unparseable payload is left as a
+  plain list. A list led by `"\\u0000list"` is a plain list whose own first
+  element is a marker string; the escape is dropped and the rest decoded.
+
   ## Direct JSON Types
 
   - `null` → `nil`
@@ -72,11 +81,65 @@ defmodule SnakeBridge.Types.Decoder do
   def decode(num) when is_number(num), do: num
   def decode(str) when is_binary(str), do: str
 
-  # Lists - recursively decode elements
-  def decode(list) when is_list(list) do
-    Enum.map(list, &decode/1)
+  # Escaped plain list that starts with a marker string (written by both encoders)
+  def decode([<<0, "list">> | elements]), do: decode_list(elements)
+
+  # Compact tuple/set form (SNAKEBRIDGE_COMPACT on the Python side)
+  def decode([<<0, "tuple">> | elements]) do
+    elements
+    |> Enum.map(&decode/1)
+    |> List.to_tuple()
+  end
+
+  def decode([<<0, "set">> | elements]) do
+    elements
+    |> Enum.map(&decode/1)
+    |> MapSet.new()
+  end
+
+  def decode([<<0, "frozenset">> | elements]) do
+    elements
+    |> Enum.map(&decode/1)
+    |> MapSet.new()
+  end
+
+  # Compact scalar forms decode like their tagged counterparts; a list whose
+  # payload does not fit the marker stays a plain list, as in the Python decoder
+  def decode([<<0, "bytes">>, data] = list) when is_binary(data) do
+    case Base.decode64(data) do
+      {:ok, binary} -> binary
+      :error -> decode_list(list)
+    end
+  end
+
+  def decode([<<0, "complex">>, real, imag]) when is_number(real) and is_number(imag) do
+    decode(%{"__type__" => "complex", "real" => real, "imag" => imag})
+  end
+
+  def decode([<<0, "datetime">>, value] = list) when is_binary(value) do
+    case NaiveDateTime.from_iso8601(value) do
+      {:ok, _naive} -> decode(%{"__type__" => "datetime", "value" => value})
+      {:error, _} -> decode_list(list)
+    end
+  end
+
+  def decode([<<0, "date">>, value] = list) when is_binary(value) do
+    case Date.from_iso8601(value) do
+      {:ok, date} -> date
+      {:error, _} -> decode_list(list)
+    end
   end
 
+  def decode([<<0, "time">>, value] = list) when is_binary(value) do
+    case Time.from_iso8601(value) do
+      {:ok, time} -> time
+      {:error, _} -> decode_list(list)
+    end
+  end
+
+  # Lists - recursively decode elements
+  def decode(list) when is_list(list), do: decode_list(list)
+
   def decode(%{"__type__" => "stream_ref"} = map) do
     SnakeBridge.StreamRef.from_wire_format(map)
   end
@@ -200,6 +263,8 @@ defmodule SnakeBridge.Types.Decoder do
   # Anything else passes through unchanged
   def decode(other), do: other
 
+  defp decode_list(list), do: Enum.map(list, &decode/1)
+
   defp list_field(map) do
     case Map.get(map, "elements") do
       nil -> Map.get(map, "value", [])
@@ -3,9 +3,11 @@ defmodule SnakeBridge.Types.Encoder do
   Encodes Elixir data structures into JSON-compatible formats for Python interop.
 
   Handles lossless encoding of Elixir types that don't have direct JSON equivalents
-  using tagged representations. Tagged values include a `__schema__` marker for
-  the current wire schema version. Atom round-trips depend on the decoder
-  allowlist.
+  using tagged representations. Tagged values built here include a `__schema__`
+  marker for the current wire schema version. The Python encoders leave it off
+  tagged values and send it once on the result envelope instead;
+  `SnakeBridge.Types.Decoder` accepts tags with or without it. Atom round-trips
+  depend on the decoder allowlist.
 
   ## Supported Types
 
@@ -15,7 +17,8 @@ defmodule SnakeBridge.Types.Encoder do
   - Integers → numbers
   - Floats → numbers
   - Strings (UTF-8) → strings
-  - Lists → arrays
+  - Lists → arrays (a list whose first element is a compact marker string such
+    as `"\\u0000set"` is sent with a leading `"\\u0000list"` escape)
   - Maps with string keys → objects
 
   ### Tagged Types
@@ -57,6 +60,20 @@ defmodule SnakeBridge.Types.Encoder do
 
   """
 
+  # First elements the decoders read as compact markers (see
+  # `SnakeBridge.Types.Decoder`); plain lists starting with one are escaped
+  @compact_markers [
+    <<0, "tuple">>,
+    <<0, "set">>,
+    <<0, "frozenset">>,
+    <<0, "bytes">>,
+    <<0, "complex">>,
+    <<0, "datetime">>,
+    <<0, "date">>,
+    <<0, "time">>,
+    <<0, "list">>
+  ]
+
   @doc """
   Encodes an Elixir value into a JSON-compatible structure.
 
@@ -110,9 +127,12 @@ defmodule SnakeBridge.Types.Encoder do
     end
   end
 
-  # Lists
+  # Lists. A list whose first element is a compact marker string gets a
+  # leading "\0list" escape so the decoders do not read it as a compact value.
   def encode(list) when is_list(list) do
-    Enum.map(list, &encode/1)
+    list
+    |> Enum.map(&encode/1)
+    |> escape_compact_marker()
   end
 
   # Tuples
@@ -188,6 +208,11 @@ defmodule SnakeBridge.Types.Encoder do
 
   # Private helpers
 
+  defp escape_compact_marker([marker | _] = list) when marker in @compact_markers,
+    do: [<<0, "list">> | list]
+
+  defp escape_compact_marker(list), do: list
+
   defp tagged(type, fields) when is_map(fields) do
     fields
     |> Map.put("__type__", type)
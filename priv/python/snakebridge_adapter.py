@@ -31,14 +31,17 @@ import importlib
 import importlib.util
 import inspect
 import traceback
-import uuid
 import os
 import glob
 import hashlib
+import math
+import secrets
 import time
 import threading
 import types
 from contextlib import nullcontext
+from itertools import repeat
+from datetime import date, datetime, time as datetime_time
 from typing import Any, Dict, List, Tuple, Optional
 
 # Import the SnakeBridge type encoding system
@@ -49,8 +52,21 @@ try:
         encode_error,
         _is_generator_or_iterator,
         _get_stream_type,
+        _b64encode_str,
+        _cache_type_entry,
+        _ASYNC_GENERATOR_TYPE,
+        _COMPACT_CONTAINERS,
+        _COMPACT_TUPLE,
+        _COMPACT_SET,
+        _COMPACT_FROZENSET,
+        _COMPACT_BYTES,
+        _COMPACT_COMPLEX,
+        _COMPACT_DATETIME,
+        _COMPACT_DATE,
+        _COMPACT_TIME,
+        _COMPACT_LIST,
+        _COMPACT_MARKERS,
         Atom,
-        SCHEMA_VERSION,
     )
 except ImportError:
     # If running as a script, try relative import
@@ -62,8 +78,21 @@ except ImportError:
         encode_error,
         _is_generator_or_iterator,
         _get_stream_type,
+        _b64encode_str,
+        _cache_type_entry,
+        _ASYNC_GENERATOR_TYPE,
+        _COMPACT_CONTAINERS,
+        _COMPACT_TUPLE,
+        _COMPACT_SET,
+        _COMPACT_FROZENSET,
+        _COMPACT_BYTES,
+        _COMPACT_COMPLEX,
+        _COMPACT_DATETIME,
+        _COMPACT_DATE,
+        _COMPACT_TIME,
+        _COMPACT_LIST,
+        _COMPACT_MARKERS,
         Atom,
-        SCHEMA_VERSION,
     )
 
 try:
@@ -74,7 +103,10 @@ except Exception:
 
 # Module cache to avoid repeated imports
 _module_cache: Dict[str, Any] = {}
-_instance_registry: Dict[str, Any] = {}
+# Ref registry, nested by session: session_id -> ref_id -> entry
+_instance_registry: Dict[str, Dict[str, Any]] = {}
+# Total refs across all sessions, kept in step with _instance_registry
+_registry_count = 0
 _helper_registry: Dict[str, Any] = {}
 _helper_registry_key: Optional[Tuple[Any, ...]] = None
 _helper_registry_index: List[Dict[str, Any]] = []
@@ -94,6 +126,23 @@ ALLOW_LEGACY_PROTOCOL = os.getenv("SNAKEBRIDGE_ALLOW_LEGACY_PROTOCOL", "false").
     "true",
     "yes",
 )
+# Skip encode_result's final _is_json_safe pass over the encoded result
+SKIP_JSON_SAFETY_CHECK = os.getenv("SNAKEBRIDGE_SKIP_JSON_SAFETY_CHECK", "false").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Exact result types that are JSON-safe as-is (no refs, no tagging needed)
+_JSON_SCALAR_TYPES = frozenset((type(None), bool, int, str))
+
+# Tagged types _is_json_safe accepts (a tuple: tags are compared, never hashed)
+_JSON_SAFE_TAGS = (
+    "bytes", "tuple", "set", "frozenset", "complex",
+    "datetime", "date", "time", "special_float",
+    "atom", "dict", "ref", "stream_ref", "callback",
+    "stop_iteration"
+)
 
 
 class SnakeBridgeHelperNotFoundError(Exception):
@@ -165,6 +214,12 @@ def _registry_limits() -> Tuple[float, int]:
     return ttl, max_size
 
 
+# Read once at import, like the other SNAKEBRIDGE_* adapter settings:
+# _prune_registry runs on every ref store/resolve/release, and two getenv
+# calls cost more than the registry work itself
+_REGISTRY_LIMITS = _registry_limits()
+
+
 def _entry_last_access(entry: Any) -> float:
     if isinstance(entry, dict):
         return float(entry.get("last_access") or entry.get("created_at") or 0.0)
@@ -177,46 +232,76 @@ def _touch_entry(entry: Any) -> None:
 
 
 def _prune_registry() -> None:
+    global _registry_count
     with _registry_lock:
-        ttl_seconds, max_size = _registry_limits()
-        now = time.time()
+        ttl_seconds, max_size = _REGISTRY_LIMITS
 
         if ttl_seconds and ttl_seconds > 0:
-            for key, entry in list(_instance_registry.items()):
-                if now - _entry_last_access(entry) > ttl_seconds:
-                    del _instance_registry[key]
-
-        if max_size and max_size > 0 and len(_instance_registry) > max_size:
-            overflow = len(_instance_registry) - max_size
-            oldest = sorted(_instance_registry.items(), key=lambda item: _entry_last_access(item[1]))
-            for key, _entry in oldest[:overflow]:
-                del _instance_registry[key]
-
-
-def _store_ref(key: str, obj: Any) -> None:
+            now = time.time()
+            for session_id, entries in list(_instance_registry.items()):
+                for ref_id, entry in list(entries.items()):
+                    if now - _entry_last_access(entry) > ttl_seconds:
+                        del entries[ref_id]
+                        _registry_count -= 1
+                if not entries:
+                    del _instance_registry[session_id]
+
+        if max_size and max_size > 0:
+            overflow = _registry_count - max_size
+            if overflow > 0:
+                oldest = sorted(
+                    (
+                        (_entry_last_access(entry), session_id, ref_id)
+                        for session_id, entries in _instance_registry.items()
+                        for ref_id, entry in entries.items()
+                    ),
+                    key=lambda item: item[0],
+                )
+                for _last_access, session_id, ref_id in oldest[:overflow]:
+                    _unregister((session_id, ref_id))
+
+
+def _registry_size() -> int:
+    """Total number of refs across all sessions."""
+    return _registry_count
+
+
+def _store_ref(key: Tuple[str, str], obj: Any) -> None:
+    global _registry_count
+    session_id, ref_id = key
     now = time.time()
     with _registry_lock:
-        _instance_registry[key] = {"obj": obj, "created_at": now, "last_access": now}
+        entries = _instance_registry.get(session_id)
+        if entries is None:
+            entries = _instance_registry[session_id] = {}
+        if ref_id not in entries:
+            _registry_count += 1
+        entries[ref_id] = {"obj": obj, "created_at": now, "last_access": now}
+
+
+def _unregister(key: Tuple[str, str]) -> bool:
+    """Remove one ref (caller holds _registry_lock); drops emptied sessions."""
+    global _registry_count
+    session_id, ref_id = key
+    entries = _instance_registry.get(session_id)
+    if entries is None or ref_id not in entries:
+        return False
+    del entries[ref_id]
+    _registry_count -= 1
+    if not entries:
+        del _instance_registry[session_id]
+    return True
 
 
-def _registry_key(session_id: str, ref_id: str) -> str:
+def _registry_key(session_id: str, ref_id: str) -> Tuple[str, str]:
     """
     Construct a registry key from session_id and ref_id.
 
     This is the single source of truth for registry key format.
     All code that constructs or parses registry keys should use this function.
+    Keys address _instance_registry[session_id][ref_id].
     """
-    return f"{session_id}:{ref_id}"
-
-
-def _registry_key_prefix(session_id: str) -> str:
-    """
-    Get the registry key prefix for a session.
-
-    Used for session-scoped operations like release_session.
-    Delegates to _registry_key to maintain single source of truth for key format.
-    """
-    return _registry_key(session_id, "")
+    return (session_id, ref_id)
 
 
 def _extract_ref_identity(ref: dict, session_id: str) -> Tuple[str, str]:
@@ -514,8 +599,13 @@ def _import_module(module_name: str) -> Any:
         return mod
 
 
+def _new_ref_id() -> str:
+    """32 hex chars from 128 random bits (same shape as uuid4().hex, ~6x cheaper)."""
+    return secrets.token_hex(16)
+
+
 def _make_ref(session_id: str, obj: Any, python_module: str, library: str) -> dict:
-    ref_id = uuid.uuid4().hex
+    ref_id = _new_ref_id()
     key = _registry_key(session_id, ref_id)
     _prune_registry()
     _store_ref(key, obj)
@@ -540,7 +630,7 @@ def _make_stream_ref(
     library: str,
     stream_type: str,
 ) -> dict:
-    ref_id = uuid.uuid4().hex
+    ref_id = _new_ref_id()
     key = _registry_key(session_id, ref_id)
     _prune_registry()
     _store_ref(key, obj)
@@ -572,7 +662,7 @@ def _cleanup_created_refs(created_keys: list) -> None:
     """Remove refs from registry that were created during a failed encode."""
     with _registry_lock:
         for key in created_keys:
-            _instance_registry.pop(key, None)
+            _unregister(key)
 
 
 def encode_result(result: Any, session_id: str, python_module: str, library: str) -> Any:
@@ -605,6 +695,11 @@ def encode_result(result: Any, session_id: str, python_module: str, library: str
     On encoding failure, any refs created during partial encoding are cleaned
     up to prevent unreachable ref leakage in the registry.
     """
+    # Plain scalar results (e.g. a tool returning a string) are already JSON-safe:
+    # skip the memo tables, the recursive walk and the safety check.
+    if type(result) in _JSON_SCALAR_TYPES:
+        return result
+
     # Use set of object ids to detect cycles
     in_progress = set()
     # Memo table: id(obj) -> ref/stream_ref payload for deduplication
@@ -628,21 +723,12 @@ def encode_result(result: Any, session_id: str, python_module: str, library: str
         )
         return _make_ref(session_id, result, python_module, library)
 
+    if SKIP_JSON_SAFETY_CHECK:
+        return encoded
+
     # Safety net: validate result is actually JSON-safe
     # This catches any edge cases missed by the recursive encoder
-    try:
-        is_safe = _is_json_safe(encoded)
-    except RecursionError:
-        # _is_json_safe itself can recurse deeply on near-limit structures
-        # Clean up any refs created during encoding
-        _cleanup_created_refs(created_keys)
-        _log_warning(
-            f"RecursionError in _is_json_safe for type {type(result).__name__}, "
-            "wrapping in ref as safety fallback"
-        )
-        return _make_ref(session_id, result, python_module, library)
-
-    if not is_safe:
+    if not _is_json_safe(encoded):
         # Clean up any refs created during encoding
         _cleanup_created_refs(created_keys)
         _log_warning(
@@ -666,6 +752,9 @@ def _encode_result_recursive(
     """
     Recursively encode a Python value, creating refs for non-serializable leaves.
 
+    Dispatches on type(value) through _RESULT_ENCODERS; the handler for any
+    other type is resolved once by _resolve_result_encoder and cached weakly.
+
     Args:
         value: The Python value to encode
         session_id: Session ID for ref tracking
@@ -678,228 +767,311 @@ def _encode_result_recursive(
     Returns:
         A JSON-safe value with refs for non-serializable objects
     """
-    import base64
-    import math
-    from datetime import datetime, date, time
+    value_type = type(value)
+    handler = _RESULT_ENCODERS.get(value_type)
+    if handler is None:
+        handler = _RESOLVED_RESULT_ENCODERS.get(id(value_type))
+        if handler is None:
+            handler = _resolve_result_encoder(value)
+            _cache_type_entry(_RESOLVED_RESULT_ENCODERS, value_type, handler)
+    return handler(value, session_id, python_module, library, in_progress, ref_memo, created_keys)
 
-    # Handle None
-    if value is None:
-        return None
 
-    # Handle booleans (must check before int - bool is subclass of int)
-    if isinstance(value, bool):
-        return value
+# Result encoder handlers. All take the arguments of _encode_result_recursive;
+# leaf handlers ignore the bookkeeping ones.
 
-    # Handle integers
-    if isinstance(value, int):
-        return value
 
-    # Handle float (check for special values)
-    if isinstance(value, float):
-        if math.isinf(value):
-            return {
-                "__type__": "special_float",
-                "__schema__": SCHEMA_VERSION,
-                "value": "infinity" if value > 0 else "neg_infinity",
-            }
-        if math.isnan(value):
-            return {
-                "__type__": "special_float",
-                "__schema__": SCHEMA_VERSION,
-                "value": "nan",
-            }
-        return value
+def _result_as_is(value, session_id, python_module, library, in_progress, ref_memo, created_keys):
+    return value
 
-    # Handle strings
-    if isinstance(value, str):
-        return value
 
-    # Handle bytes/bytearray - always tagged
-    if isinstance(value, (bytes, bytearray)):
+def _result_float(value, session_id, python_module, library, in_progress, ref_memo, created_keys):
+    # Check for special values
+    if math.isinf(value):
         return {
-            "__type__": "bytes",
-            "__schema__": SCHEMA_VERSION,
-            "data": base64.b64encode(bytes(value)).decode("ascii"),
+            "__type__": "special_float",
+            "value": "infinity" if value > 0 else "neg_infinity",
         }
-
-    # Handle complex
-    if isinstance(value, complex):
+    if math.isnan(value):
         return {
-            "__type__": "complex",
-            "__schema__": SCHEMA_VERSION,
-            "real": value.real,
-            "imag": value.imag,
+            "__type__": "special_float",
+            "value": "nan",
         }
+    return value
 
-    # Handle datetime types
-    if isinstance(value, datetime):
-        return {
-            "__type__": "datetime",
-            "__schema__": SCHEMA_VERSION,
-            "value": value.isoformat(),
-        }
-    if isinstance(value, date):
+
+def _result_bytes(value, session_id, python_module, library, in_progress, ref_memo, created_keys):
+    # Base64 straight from the buffer, no copy
+    if _COMPACT_CONTAINERS:
+        return [_COMPACT_BYTES, _b64encode_str(value)]
+    return {
+        "__type__": "bytes",
+        "data": _b64encode_str(value),
+    }
+
+
+def _result_complex(value, session_id, python_module, library, in_progress, ref_memo, created_keys):
+    if _COMPACT_CONTAINERS:
+        return [_COMPACT_COMPLEX, value.real, value.imag]
+    return {
+        "__type__": "complex",
+        "real": value.real,
+        "imag": value.imag,
+    }
+
+
+def _result_datetime(value, session_id, python_module, library, in_progress, ref_memo, created_keys):
+    if _COMPACT_CONTAINERS:
+        return [_COMPACT_DATETIME, value.isoformat()]
+    return {
+        "__type__": "datetime",
+        "value": value.isoformat(),
+    }
+
+
+def _result_date(value, session_id, python_module, library, in_progress, ref_memo, created_keys):
+    if _COMPACT_CONTAINERS:
+        return [_COMPACT_DATE, value.isoformat()]
+    return {
+        "__type__": "date",
+        "value": value.isoformat(),
+    }
+
+
+def _result_time(value, session_id, python_module, library, in_progress, ref_memo, created_keys):
+    if _COMPACT_CONTAINERS:
+        return [_COMPACT_TIME, value.isoformat()]
+    return {
+        "__type__": "time",
+        "value": value.isoformat(),
+    }
+
+
+def _result_atom(value, session_id, python_module, library, in_progress, ref_memo, created_keys):
+    # Tagged atom value for Elixir interop
+    return {
+        "__type__": "atom",
+        "value": value.value,
+    }
+
+
+def _result_ref(value, session_id, python_module, library, in_progress, ref_memo, created_keys):
+    # Custom objects, functions, modules, async generators (which cannot be
+    # consumed via next()), etc. - create a ref (with memoization)
+    obj_id = id(value)
+    if obj_id in ref_memo:
+        return ref_memo[obj_id]
+    ref_payload = _make_ref(session_id, value, python_module, library)
+    created_keys.append(_registry_key(session_id, ref_payload['id']))
+    ref_memo[obj_id] = ref_payload
+    return ref_payload
+
+
+def _result_stream_ref(value, session_id, python_module, library, in_progress, ref_memo, created_keys):
+    # Sync generators/iterators - create stream_ref in-place
+    obj_id = id(value)
+    if obj_id in ref_memo:
+        return ref_memo[obj_id]
+    stream_type = _get_stream_type(value)
+    stream_ref_payload = _make_stream_ref(session_id, value, python_module, library, stream_type)
+    created_keys.append(_registry_key(session_id, stream_ref_payload['id']))
+    ref_memo[obj_id] = stream_ref_payload
+    return stream_ref_payload
+
+
+def _result_list(value, session_id, python_module, library, in_progress, ref_memo, created_keys):
+    # Cycle detection: if we're already encoding this object, create a ref
+    # (memoized, so the same object always yields the same ref)
+    obj_id = id(value)
+    if obj_id in in_progress:
+        return _result_ref(value, session_id, python_module, library, in_progress, ref_memo, created_keys)
+    in_progress.add(obj_id)
+    try:
+        # Snapshot to avoid "list changed size during iteration" errors
+        items = list(value)
+        encoded = [
+            _encode_result_recursive(item, session_id, python_module, library, in_progress, ref_memo, created_keys)
+            for item in items
+        ]
+        # Keep a list that starts with a compact marker string a plain list
+        if encoded and type(encoded[0]) is str and encoded[0] in _COMPACT_MARKERS:
+            return [_COMPACT_LIST, *encoded]
+        return encoded
+    finally:
+        in_progress.discard(obj_id)
+
+
+def _result_tuple(value, session_id, python_module, library, in_progress, ref_memo, created_keys):
+    obj_id = id(value)
+    if obj_id in in_progress:
+        return _result_ref(value, session_id, python_module, library, in_progress, ref_memo, created_keys)
+    in_progress.add(obj_id)
+    try:
+        # Tuples are immutable, but snapshot for consistency
+        items = tuple(value)
+        elements = [
+            _encode_result_recursive(item, session_id, python_module, library, in_progress, ref_memo, created_keys)
+            for item in items
+        ]
+        if _COMPACT_CONTAINERS:
+            return [_COMPACT_TUPLE, *elements]
         return {
-            "__type__": "date",
-            "__schema__": SCHEMA_VERSION,
-            "value": value.isoformat(),
+            "__type__": "tuple",
+            "elements": elements,
         }
-    if isinstance(value, time):
+    finally:
+        in_progress.discard(obj_id)
+
+
+def _result_set(value, session_id, python_module, library, in_progress, ref_memo, created_keys):
+    # No sorting; sets have no order semantics
+    obj_id = id(value)
+    if obj_id in in_progress:
+        return _result_ref(value, session_id, python_module, library, in_progress, ref_memo, created_keys)
+    in_progress.add(obj_id)
+    try:
+        # Snapshot to avoid "set changed size during iteration" errors
+        items = list(value)
+        elements = [
+            _encode_result_recursive(item, session_id, python_module, library, in_progress, ref_memo, created_keys)
+            for item in items
+        ]
+        if _COMPACT_CONTAINERS:
+            return [_COMPACT_SET, *elements]
         return {
-            "__type__": "time",
-            "__schema__": SCHEMA_VERSION,
-            "value": value.isoformat(),
+            "__type__": "set",
+            "elements": elements,
         }
+    finally:
+        in_progress.discard(obj_id)
+
 
-    # Handle Atom - tagged atom value for Elixir interop
-    if isinstance(value, Atom):
+def _result_frozenset(value, session_id, python_module, library, in_progress, ref_memo, created_keys):
+    # No sorting; sets have no order semantics
+    obj_id = id(value)
+    if obj_id in in_progress:
+        return _result_ref(value, session_id, python_module, library, in_progress, ref_memo, created_keys)
+    in_progress.add(obj_id)
+    try:
+        # Frozensets are immutable, but snapshot for consistency
+        items = list(value)
+        elements = [
+            _encode_result_recursive(item, session_id, python_module, library, in_progress, ref_memo, created_keys)
+            for item in items
+        ]
+        if _COMPACT_CONTAINERS:
+            return [_COMPACT_FROZENSET, *elements]
         return {
-            "__type__": "atom",
-            "__schema__": SCHEMA_VERSION,
-            "value": value.value,
+            "__type__": "frozenset",
+            "elements": elements,
         }
+    finally:
+        in_progress.discard(obj_id)
 
-    # Check for async generators FIRST - these cannot be consumed via next()
-    # so we treat them as regular refs, not stream_refs
-    if hasattr(types, 'AsyncGeneratorType') and isinstance(value, types.AsyncGeneratorType):
-        obj_id = id(value)
-        if obj_id in ref_memo:
-            return ref_memo[obj_id]
-        ref_payload = _make_ref(session_id, value, python_module, library)
-        created_keys.append(_registry_key(session_id, ref_payload['id']))
-        ref_memo[obj_id] = ref_payload
-        return ref_payload
-
-    # Check for sync generators/iterators - create stream_ref in-place
-    if _is_generator_or_iterator(value):
-        obj_id = id(value)
-        if obj_id in ref_memo:
-            return ref_memo[obj_id]
-        stream_type = _get_stream_type(value)
-        stream_ref_payload = _make_stream_ref(session_id, value, python_module, library, stream_type)
-        created_keys.append(_registry_key(session_id, stream_ref_payload['id']))
-        ref_memo[obj_id] = stream_ref_payload
-        return stream_ref_payload
-
-    # For container types, check for cycles
-    obj_id = id(value)
 
-    # Cycle detection: if we're already encoding this object, create a ref
-    # Use memo if available to ensure same ref for same object
+def _result_dict(value, session_id, python_module, library, in_progress, ref_memo, created_keys):
+    obj_id = id(value)
     if obj_id in in_progress:
-        if obj_id in ref_memo:
-            return ref_memo[obj_id]
-        ref_payload = _make_ref(session_id, value, python_module, library)
-        created_keys.append(_registry_key(session_id, ref_payload['id']))
-        ref_memo[obj_id] = ref_payload
-        return ref_payload
-
-    # Handle list - recursively encode elements, refs for non-encodable
-    # Snapshot to avoid "list changed size during iteration" errors
-    if isinstance(value, list):
-        in_progress.add(obj_id)
-        try:
-            items = list(value)  # Snapshot
-            return [
-                _encode_result_recursive(item, session_id, python_module, library, in_progress, ref_memo, created_keys)
-                for item in items
-            ]
-        finally:
-            in_progress.discard(obj_id)
+        return _result_ref(value, session_id, python_module, library, in_progress, ref_memo, created_keys)
+    in_progress.add(obj_id)
+    try:
+        # Snapshot to avoid "dictionary changed size during iteration" errors
+        items = list(value.items())
+        all_string_keys = all(isinstance(k, str) for k, _ in items)
 
-    # Handle tuple - recursively encode elements
-    # Tuples are immutable, but snapshot for consistency
-    if isinstance(value, tuple):
-        in_progress.add(obj_id)
-        try:
-            items = tuple(value)  # Snapshot (tuples are immutable but be consistent)
-            elements = [
-                _encode_result_recursive(item, session_id, python_module, library, in_progress, ref_memo, created_keys)
-                for item in items
-            ]
+        if all_string_keys:
+            # Plain dict with string keys
             return {
-                "__type__": "tuple",
-                "__schema__": SCHEMA_VERSION,
-                "elements": elements,
+                k: _encode_result_recursive(v, session_id, python_module, library, in_progress, ref_memo, created_keys)
+                for k, v in items
             }
-        finally:
-            in_progress.discard(obj_id)
-
-    # Handle set - recursively encode elements (no sorting; sets have no order semantics)
-    # Snapshot to avoid "set changed size during iteration" errors
-    if isinstance(value, set):
-        in_progress.add(obj_id)
-        try:
-            items = list(value)  # Snapshot
-            elements = [
-                _encode_result_recursive(item, session_id, python_module, library, in_progress, ref_memo, created_keys)
-                for item in items
+        else:
+            # Tagged dict with pairs for non-string keys
+            pairs = [
+                [
+                    _encode_result_recursive(k, session_id, python_module, library, in_progress, ref_memo, created_keys),
+                    _encode_result_recursive(v, session_id, python_module, library, in_progress, ref_memo, created_keys),
+                ]
+                for k, v in items
             ]
             return {
-                "__type__": "set",
-                "__schema__": SCHEMA_VERSION,
-                "elements": elements,
+                "__type__": "dict",
+                "pairs": pairs,
             }
-        finally:
-            in_progress.discard(obj_id)
+    finally:
+        in_progress.discard(obj_id)
+
+
+_RESULT_ENCODERS = {
+    type(None): _result_as_is,
+    bool: _result_as_is,
+    int: _result_as_is,
+    str: _result_as_is,
+    float: _result_float,
+    bytes: _result_bytes,
+    bytearray: _result_bytes,
+    complex: _result_complex,
+    datetime: _result_datetime,
+    date: _result_date,
+    datetime_time: _result_time,
+    Atom: _result_atom,
+    list: _result_list,
+    tuple: _result_tuple,
+    set: _result_set,
+    frozenset: _result_frozenset,
+    dict: _result_dict,
+}
+
+# id(type) -> handler resolved for types outside _RESULT_ENCODERS (subclasses,
+# user classes). Filled through _cache_type_entry, which drops an entry when
+# its class is collected.
+_RESOLVED_RESULT_ENCODERS: Dict[int, Any] = {}
+
+# Base-class checks for types missing from _RESULT_ENCODERS, in precedence
+# order (bool before int, datetime before date)
+_RESULT_SUBCLASS_ENCODERS = (
+    (bool, _result_as_is),
+    (int, _result_as_is),
+    (float, _result_float),
+    (str, _result_as_is),
+    ((bytes, bytearray), _result_bytes),
+    (complex, _result_complex),
+    (datetime, _result_datetime),
+    (date, _result_date),
+    (datetime_time, _result_time),
+    (Atom, _result_atom),
+)
 
-    # Handle frozenset - recursively encode elements (no sorting; sets have no order semantics)
-    # Frozensets are immutable, but snapshot for consistency
-    if isinstance(value, frozenset):
-        in_progress.add(obj_id)
-        try:
-            items = list(value)  # Snapshot
-            elements = [
-                _encode_result_recursive(item, session_id, python_module, library, in_progress, ref_memo, created_keys)
-                for item in items
-            ]
-            return {
-                "__type__": "frozenset",
-                "__schema__": SCHEMA_VERSION,
-                "elements": elements,
-            }
-        finally:
-            in_progress.discard(obj_id)
+_RESULT_SUBCLASS_CONTAINERS = (
+    (list, _result_list),
+    (tuple, _result_tuple),
+    (set, _result_set),
+    (frozenset, _result_frozenset),
+    (dict, _result_dict),
+)
 
-    # Handle dict - recursively encode values (and keys if non-string)
-    # Snapshot to avoid "dictionary changed size during iteration" errors
-    if isinstance(value, dict):
-        in_progress.add(obj_id)
-        try:
-            items = list(value.items())  # Snapshot
-            all_string_keys = all(isinstance(k, str) for k, _ in items)
-
-            if all_string_keys:
-                # Plain dict with string keys
-                return {
-                    k: _encode_result_recursive(v, session_id, python_module, library, in_progress, ref_memo, created_keys)
-                    for k, v in items
-                }
-            else:
-                # Tagged dict with pairs for non-string keys
-                pairs = [
-                    [
-                        _encode_result_recursive(k, session_id, python_module, library, in_progress, ref_memo, created_keys),
-                        _encode_result_recursive(v, session_id, python_module, library, in_progress, ref_memo, created_keys),
-                    ]
-                    for k, v in items
-                ]
-                return {
-                    "__type__": "dict",
-                    "__schema__": SCHEMA_VERSION,
-                    "pairs": pairs,
-                }
-        finally:
-            in_progress.discard(obj_id)
-
-    # EVERYTHING ELSE - create a ref (with memoization)
-    # This includes custom objects, functions, modules, etc.
-    if obj_id in ref_memo:
-        return ref_memo[obj_id]
-    ref_payload = _make_ref(session_id, value, python_module, library)
-    created_keys.append(_registry_key(session_id, ref_payload['id']))
-    ref_memo[obj_id] = ref_payload
-    return ref_payload
+
+def _resolve_result_encoder(value: Any):
+    """
+    Pick the result handler for a value whose type is missing from
+    _RESULT_ENCODERS. Every check depends only on type(value), so the
+    handler can be cached per type in _RESOLVED_RESULT_ENCODERS.
+    """
+    value_type = type(value)
+    for base, handler in _RESULT_SUBCLASS_ENCODERS:
+        if issubclass(value_type, base):
+            return handler
+    # Async generators can't be consumed via next(), so they are regular refs
+    # (checked before the iterator protocol)
+    if _ASYNC_GENERATOR_TYPE is not None and issubclass(value_type, _ASYNC_GENERATOR_TYPE):
+        return _result_ref
+    # Sync generators/iterators become stream_refs
+    if _is_generator_or_iterator(value):
+        return _result_stream_ref
+    for base, handler in _RESULT_SUBCLASS_CONTAINERS:
+        if issubclass(value_type, base):
+            return handler
+    return _result_ref
 
 
 def _is_streamable(value: Any) -> bool:
@@ -947,37 +1119,50 @@ def _is_json_safe(value: Any) -> bool:
     This is a safety check after encoding - if encode() is correct,
     this should always return True.
     """
-    import math
+    # Walk an explicit stack rather than recursing, so the check costs no
+    # frame per container and cannot hit the recursion limit itself
+    stack = [value]
+    pop = stack.pop
+    extend = stack.extend
+    while stack:
+        item = pop()
+        # Exact builtin types (everything the encoder itself produces) first
+        item_type = type(item)
+        if item_type in _JSON_SCALAR_TYPES:
+            continue
+        if item_type is float:
+            # Non-JSON floats (inf/nan) should be tagged already
+            if item - item != 0.0:
+                return False
+            continue
+        if item_type is list:
+            extend(item)
+            continue
+        if item_type is dict:
+            if item.get("__type__") not in _JSON_SAFE_TAGS and not all(map(isinstance, item, repeat(str))):
+                # Regular dict - keys must be strings
+                return False
+            extend(item.values())
+            continue
 
-    if value is None:
-        return True
-    if isinstance(value, bool):
-        return True
-    if isinstance(value, (int, float)):
-        # Check for non-JSON floats (should be tagged already)
-        if isinstance(value, float) and (math.isinf(value) or math.isnan(value)):
-            return False
-        return True
-    if isinstance(value, str):
-        return True
-    if isinstance(value, list):
-        return all(_is_json_safe(item) for item in value)
-    if isinstance(value, dict):
-        # Check for valid tagged types
-        type_tag = value.get("__type__")
-        if type_tag in (
-            "bytes", "tuple", "set", "frozenset", "complex",
-            "datetime", "date", "time", "special_float",
-            "atom", "dict", "ref", "stream_ref", "callback",
-            "stop_iteration"
-        ):
-            # Tagged values are safe - validate values recursively
-            return all(_is_json_safe(v) for v in value.values())
-        # Regular dict - keys must be strings
-        if not all(isinstance(k, str) for k in value.keys()):
-            return False
-        return all(_is_json_safe(v) for v in value.values())
-    return False
+        # Subclasses of the builtin types
+        if isinstance(item, (int, str)):
+            continue
+        if isinstance(item, float):
+            if math.isinf(item) or math.isnan(item):
+                return False
+            continue
+        if isinstance(item, list):
+            extend(item)
+            continue
+        if isinstance(item, dict):
+            # Tagged values are safe; otherwise keys must be strings
+            if item.get("__type__") not in _JSON_SAFE_TAGS and not all(isinstance(k, str) for k in item.keys()):
+                return False
+            extend(item.values())
+            continue
+        return False
+    return True
 
 
 def _log_warning(message: str) -> None:
@@ -1013,12 +1198,12 @@ def _resolve_ref(ref: dict, session_id: str) -> Any:
     with _registry_lock:
         _prune_registry()
         ref_id, ref_session = _extract_ref_identity(ref, session_id)
-        key = _registry_key(ref_session, ref_id)
+        entries = _instance_registry.get(ref_session)
 
-        if key not in _instance_registry:
+        if entries is None or ref_id not in entries:
             raise KeyError(f"Unknown SnakeBridge reference: {ref_id}")
 
-        entry = _instance_registry[key]
+        entry = entries[ref_id]
         if isinstance(entry, dict):
             _touch_entry(entry)
             return entry.get("obj")
@@ -1032,27 +1217,20 @@ def _release_ref(ref: dict, session_id: str) -> bool:
     with _registry_lock:
         _prune_registry()
         ref_id, ref_session = _extract_ref_identity(ref, session_id)
-        key = _registry_key(ref_session, ref_id)
-
-        if key in _instance_registry:
-            del _instance_registry[key]
-            return True
-        return False
+        return _unregister(_registry_key(ref_session, ref_id))
 
 
 def _release_session(session_id: str) -> int:
+    global _registry_count
     if not session_id:
         return 0
 
     with _registry_lock:
-        removed = 0
-        prefix = _registry_key_prefix(session_id)
-        for key in list(_instance_registry.keys()):
-            if key.startswith(prefix):
-                del _instance_registry[key]
-                removed += 1
-
-        return removed
+        entries = _instance_registry.pop(session_id, None)
+        if not entries:
+            return 0
+        _registry_count -= len(entries)
+        return len(entries)
 
 
 def _default_helper_config() -> Dict[str, Any]:
@@ -17,33 +17,115 @@ Supported special types:
 - special_float: Positive infinity, negative infinity, and NaN (encoded with __type__ tag)
 - dict: Tagged dict format for non-string keys (with pairs array)
 
+Schema version:
+- Tagged values do not repeat __schema__; encode_result/encode_error carry it
+  once on the envelope. decode() ignores __schema__ wherever it appears, so
+  payloads with per-value __schema__ keys still decode.
+
 Encoding safety:
 - Non-JSON-serializable values return {"__needs_ref__": True, ...} marker
 - Containers with unencodable items return __needs_ref__ marker for whole container
 - Iterators/generators return {"__needs_stream_ref__": True, ...} marker
 - This ensures NEVER returning partially-encoded or lossy representations
+
+Wire options:
+- SNAKEBRIDGE_COMPACT=true: tuples/sets/frozensets and bytes/complex/datetime/
+  date/time values are encoded as marker lists (["\\x00tuple", 1, 2],
+  ["\\x00complex", 1.0, 2.0]) instead of tagged dicts. This also applies to
+  adapter call results. Decoding accepts both forms whatever the setting.
+  A plain list whose first element is a marker string is always sent with a
+  leading "\\x00list" escape, so it still decodes as a plain list.
+- SNAKEBRIDGE_SORT_SETS=true: set elements are sorted (by type name, then str)
+  instead of emitted in iteration order.
 """
 
-import base64
+import binascii
 import inspect
 import json
-import math
 import os
+import sys
 import types
+import weakref
+from functools import partial
+from itertools import islice, repeat
 from datetime import datetime, date, time
-from typing import Any, Dict, List, Union
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
 
 SCHEMA_VERSION = 1
 
+# Key carried by every tagged value. Interned explicitly so lookups against
+# decoded payloads and freshly built tags share one key object.
+_TYPE_KEY = sys.intern("__type__")
+
 # Supported types for direct JSON encoding (primitives)
 JSON_SAFE_PRIMITIVES = (type(None), bool, int, float, str)
 
+# Exact JSON scalar types that decode() returns unchanged
+_DECODE_PASSTHROUGH = frozenset(JSON_SAFE_PRIMITIVES)
+
+# Primitives encode() returns unchanged (float is excluded: inf/nan get tagged)
+_ENCODE_PASSTHROUGH = frozenset((type(None), bool, int, str))
+
+# Exact scalar types; containers holding only these can never need a ref
+_ENCODE_SCALARS = _ENCODE_PASSTHROUGH | {float}
+
+# Opt-in compact wire form (SNAKEBRIDGE_COMPACT=true): tuples, sets and the
+# tagged scalar types become a list whose first element is a NUL-prefixed marker
+# instead of a tagged dict, e.g. ["\x00tuple", 1, 2] or ["\x00date", "2024-01-02"].
+# Both decoders accept it regardless of the setting.
+_COMPACT_CONTAINERS = os.environ.get("SNAKEBRIDGE_COMPACT", "").strip().lower() in ("true", "1", "yes")
+_COMPACT_TUPLE = "\x00tuple"
+_COMPACT_SET = "\x00set"
+_COMPACT_FROZENSET = "\x00frozenset"
+_COMPACT_BYTES = "\x00bytes"
+_COMPACT_COMPLEX = "\x00complex"
+_COMPACT_DATETIME = "\x00datetime"
+_COMPACT_DATE = "\x00date"
+_COMPACT_TIME = "\x00time"
+# Escape for a plain list whose first element is itself one of these marker
+# strings: it is sent as ["\x00list", *items] so decoders on either side do not
+# mistake it for a compact value. Written whatever the setting, since both
+# decoders always recognise the markers.
+_COMPACT_LIST = "\x00list"
+_COMPACT_MARKERS = frozenset((
+    _COMPACT_TUPLE, _COMPACT_SET, _COMPACT_FROZENSET, _COMPACT_BYTES, _COMPACT_COMPLEX,
+    _COMPACT_DATETIME, _COMPACT_DATE, _COMPACT_TIME, _COMPACT_LIST,
+))
+
+# Decode atoms to Atom instances instead of plain strings
+# (SNAKEBRIDGE_ATOM_CLASS=true). Read once at import.
+_ATOM_CLASS = os.environ.get("SNAKEBRIDGE_ATOM_CLASS", "").strip().lower() in ("true", "1", "yes")
+
+# Sets are encoded in iteration order; Elixir decodes them to MapSets, so order
+# carries no meaning. SNAKEBRIDGE_SORT_SETS=true restores the old sorted output
+# (stable across processes, useful for golden files and diffs).
+_SORT_SETS = os.environ.get("SNAKEBRIDGE_SORT_SETS", "").strip().lower() in ("true", "1", "yes")
+
 
 class Atom:
-    """Represents an Elixir atom value on the Python side."""
+    """
+    Represents an Elixir atom value on the Python side.
+
+    Atom names come from a small vocabulary, so they are interned: repeated
+    atoms share one string and equality is usually a pointer compare.
+    """
+
+    __slots__ = ("value",)
+    __match_args__ = ("value",)
 
     def __init__(self, value: str):
-        self.value = str(value)
+        self.value = sys.intern(value if type(value) is str else str(value))
 
     def __repr__(self) -> str:
         return f"Atom({self.value!r})"
@@ -51,14 +133,75 @@ class Atom:
     def __str__(self) -> str:
         return self.value
 
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Atom):
+            return self.value == other.value
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.value)
+
+
+class _Ref:
+    """
+    Internal stand-in for a __needs_ref__ / __needs_stream_ref__ marker.
+
+    The _encode_* helpers return this instead of a marker dict so parents can
+    spot it with a single identity check; encode() turns it into the public
+    marker dict only at the top level.
+    """
+
+    __slots__ = ("type_name", "module", "reason", "stream_type")
+
+    def __init__(self, type_name: str, module: str, reason: str = None, stream_type: str = None):
+        self.type_name = type_name
+        self.module = module
+        self.reason = reason
+        self.stream_type = stream_type
+
+    def to_marker(self) -> Dict[str, Any]:
+        """Build the public marker dict returned by encode()."""
+        if self.stream_type is not None:
+            return {
+                "__needs_stream_ref__": True,
+                "__stream_type__": self.stream_type,
+                "__type_name__": self.type_name,
+                "__module__": self.module,
+            }
+        marker = {
+            "__needs_ref__": True,
+            "__type_name__": self.type_name,
+            "__module__": self.module,
+        }
+        if self.reason is not None:
+            marker["__reason__"] = self.reason
+        return marker
+
 
 def _tag(type_tag: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a tagged value from a payload dict.
+
+    DEPRECATED: The encoders build tagged dicts as literals, which sizes the
+    dict once instead of copying the payload and inserting two more keys.
+    """
     tagged = dict(payload)
-    tagged["__type__"] = type_tag
-    tagged["__schema__"] = SCHEMA_VERSION
+    tagged[_TYPE_KEY] = type_tag
     return tagged
 
 
+if pybase64 is not None:
+    _b64encode_str = pybase64.b64encode_as_string
+    _b64decode = pybase64.b64decode
+else:
+    def _b64encode_str(data) -> str:
+        """Base64-encode any bytes-like object to an ASCII str."""
+        return binascii.b2a_base64(data, newline=False).decode("ascii")
+
+    # Same non-strict decoding as base64.b64decode, minus its wrapper layer
+    _b64decode = binascii.a2b_base64
+
+
 def encode(value: Any) -> Any:
     """
     Encode a Python value to a JSON-safe value with __type__ tags for special types.
@@ -81,183 +224,215 @@ def encode(value: Any) -> Any:
 
     Examples:
         >>> encode((1, 2, 3))
-        {'__type__': 'tuple', '__schema__': 1, 'elements': [1, 2, 3]}
+        {'__type__': 'tuple', 'elements': [1, 2, 3]}
 
         >>> encode({1, 2, 3})
-        {'__type__': 'set', '__schema__': 1, 'elements': [1, 2, 3]}
+        {'__type__': 'set', 'elements': [1, 2, 3]}
 
         >>> encode(b'hello')
-        {'__type__': 'bytes', '__schema__': 1, 'data': 'aGVsbG8='}
+        {'__type__': 'bytes', 'data': 'aGVsbG8='}
 
         >>> encode(1+2j)
-        {'__type__': 'complex', '__schema__': 1, 'real': 1.0, 'imag': 2.0}
+        {'__type__': 'complex', 'real': 1.0, 'imag': 2.0}
     """
-    # Handle None
-    if value is None:
-        return None
+    encoded = _encode_value(value)
+    if type(encoded) is _Ref:
+        return encoded.to_marker()
+    return encoded
 
-    # Handle booleans (must check before int - bool is subclass of int)
-    if isinstance(value, bool):
-        return value
 
-    # Handle integers
-    if isinstance(value, int):
+def _encode_value(value: Any) -> Any:
+    """encode() without materializing _Ref markers; used for recursion."""
+    # Exact-type lookups cover the common types without walking the
+    # isinstance ladder, which is left to subclasses, iterators and unknowns.
+    value_type = type(value)
+    if value_type in _ENCODE_PASSTHROUGH:
+        return value
+    encoder = _ENCODERS.get(value_type)
+    if encoder is not None:
+        return encoder(value)
+    if isinstance(value, (int, str)):
+        # IntEnum, str enums and friends: one isinstance check is cheaper than
+        # any per-type cache lookup
         return value
+    return _encode_slow(value)
 
-    # Handle float (check for special values)
-    if isinstance(value, float):
-        return _encode_float(value)
 
-    # Handle strings
-    if isinstance(value, str):
-        return value
+def _encode_slow(value: Any) -> Any:
+    """
+    Encode values whose exact type is not in _ENCODERS.
 
-    # Handle bytes/bytearray - always tagged
-    if isinstance(value, (bytes, bytearray)):
-        return _tag("bytes", {"data": base64.b64encode(bytes(value)).decode("ascii")})
+    Subclasses of other supported types (namedtuple, OrderedDict, ...) are
+    matched to their base type's encoder once and cached in
+    _RESOLVED_SUBCLASS_ENCODERS. Everything else is turned into a ref (or
+    stream ref).
+    """
+    value_type = type(value)
+    encoder = _RESOLVED_SUBCLASS_ENCODERS.get(id(value_type))
+    if encoder is not None:
+        return encoder(value)
+    if not _is_opaque_type(value_type):
+        encoder = _subclass_encoder(value_type)
+        if encoder is not None:
+            _cache_type_entry(_RESOLVED_SUBCLASS_ENCODERS, value_type, encoder)
+            return encoder(value)
+
+    type_name = value_type.__name__
+    type_module = value_type.__module__
 
-    # Handle tagged atoms
-    if isinstance(value, Atom):
-        return _tag("atom", {"value": value.value})
+    # Detect generators and iterators - need stream ref
+    if _is_generator_or_iterator(value):
+        return _Ref(type_name, type_module, stream_type=_get_stream_type(value))
 
-    # Handle tuple - check for unencodable items
-    if isinstance(value, tuple):
-        return _encode_tuple(value)
+    # EVERYTHING ELSE - needs a ref
+    # This is the critical safety net
+    return _Ref(type_name, type_module)
 
-    # Handle frozenset - check for unencodable items
-    if isinstance(value, frozenset):
-        return _encode_frozenset(value)
 
-    # Handle set - check for unencodable items
-    if isinstance(value, set):
-        return _encode_set(value)
+def _encode_bytes(value: Union[bytes, bytearray]) -> Any:
+    """Encode bytes/bytearray as base64 (both backends take bytes-like input)."""
+    if _COMPACT_CONTAINERS:
+        return [_COMPACT_BYTES, _b64encode_str(value)]
+    return {"__type__": "bytes", "data": _b64encode_str(value)}
 
-    # Handle complex
-    if isinstance(value, complex):
-        return _tag("complex", {"real": value.real, "imag": value.imag})
 
-    # Handle datetime types
-    if isinstance(value, datetime):
-        return _tag("datetime", {"value": value.isoformat()})
-    if isinstance(value, date):
-        return _tag("date", {"value": value.isoformat()})
-    if isinstance(value, time):
-        return _tag("time", {"value": value.isoformat()})
+def _encode_atom(value: Atom) -> Dict[str, Any]:
+    """Encode an Atom as a tagged atom."""
+    return {"__type__": "atom", "value": value.value}
 
-    # Handle list - check for unencodable items
-    if isinstance(value, list):
-        return _encode_list(value)
 
-    # Handle dict - handle carefully (may need tagged format)
-    if isinstance(value, dict):
-        return _encode_dict(value)
+def _encode_complex(value: complex) -> Any:
+    """Encode a complex number as tagged real/imag parts."""
+    if _COMPACT_CONTAINERS:
+        return [_COMPACT_COMPLEX, value.real, value.imag]
+    return {"__type__": "complex", "real": value.real, "imag": value.imag}
 
-    # Detect generators and iterators - need stream ref
-    if _is_generator_or_iterator(value):
-        return {
-            "__needs_stream_ref__": True,
-            "__stream_type__": _get_stream_type(value),
-            "__type_name__": type(value).__name__,
-            "__module__": type(value).__module__,
-        }
 
-    # EVERYTHING ELSE - needs a ref
-    # This is the critical safety net
-    return {
-        "__needs_ref__": True,
-        "__type_name__": type(value).__name__,
-        "__module__": type(value).__module__,
-    }
+def _encode_datetime(value: datetime) -> Any:
+    """Encode a datetime as a tagged ISO 8601 string."""
+    if _COMPACT_CONTAINERS:
+        return [_COMPACT_DATETIME, value.isoformat()]
+    return {"__type__": "datetime", "value": value.isoformat()}
+
+
+def _encode_date(value: date) -> Any:
+    """Encode a date as a tagged ISO 8601 string."""
+    if _COMPACT_CONTAINERS:
+        return [_COMPACT_DATE, value.isoformat()]
+    return {"__type__": "date", "value": value.isoformat()}
+
+
+def _encode_time(value: time) -> Any:
+    """Encode a time as a tagged ISO 8601 string."""
+    if _COMPACT_CONTAINERS:
+        return [_COMPACT_TIME, value.isoformat()]
+    return {"__type__": "time", "value": value.isoformat()}
 
 
 def _encode_float(value: float) -> Any:
     """Encode a float, handling special values."""
-    if math.isinf(value):
-        return _tag("special_float", {"value": "infinity" if value > 0 else "neg_infinity"})
-    if math.isnan(value):
-        return _tag("special_float", {"value": "nan"})
-    return value
+    # Finite floats are the overwhelmingly common case: x - x is 0.0 for
+    # every finite x and nan for +/-inf and nan, so one subtract and compare
+    # (no math.* call) lets them through untagged.
+    if value - value == 0.0:
+        return value
+    if value != value:
+        return {"__type__": "special_float", "value": "nan"}
+    special = "infinity" if value > 0 else "neg_infinity"
+    return {"__type__": "special_float", "value": special}
+
+
+def _encode_elements(values: Any, type_name: str) -> Any:
+    """
+    Encode the items of a tuple/list/set/frozenset into a list.
+
+    Returns the encoded list, or a _Ref for the whole container if any item
+    is unencodable or an iterator/generator.
+    """
+    # Scalar-only containers (the common case) skip per-item encode() calls
+    # and marker checks: one C-level pass collects the item types.
+    if not values:
+        return []
+    item_types = set(map(type, values))
+    if item_types <= _ENCODE_PASSTHROUGH:
+        return list(values)
+    if item_types <= _ENCODE_SCALARS:
+        return [
+            item if type(item) is not float or item - item == 0.0 else _encode_float(item)
+            for item in values
+        ]
+    if any(map(_is_opaque_type, item_types)):
+        # Some item can never be encoded, so the container needs a ref whatever
+        # its siblings hold. Scalars cannot fail, so only the other items are
+        # encoded, in order, until the first failure (for the reason).
+        for item in values:
+            if type(item) in _ENCODE_SCALARS:
+                continue
+            enc = _encode_value(item)
+            if type(enc) is _Ref:
+                return _container_ref(enc, type_name)
+
+    elements = [None] * len(values)
+    for index, item in enumerate(values):
+        enc = _encode_value(item)
+        if type(enc) is _Ref:
+            return _container_ref(enc, type_name)
+        elements[index] = enc
+    return elements
+
+
+def _container_ref(enc: "_Ref", type_name: str) -> "_Ref":
+    """Ref for a builtin container holding an item that needed a ref."""
+    if enc.stream_type is None:
+        # Item can't be encoded - whole container needs ref-wrapping
+        return _Ref(type_name, "builtins", f"contains unencodable item of type {enc.type_name}")
+    # Item is an iterator - whole container needs ref-wrapping
+    return _Ref(type_name, "builtins", "contains iterator/generator")
+
+
+def _set_sort_key(item: Any) -> tuple:
+    return (type(item).__name__, str(item))
+
+
+def _set_items(value: Union[set, frozenset]) -> Any:
+    """Items of a set in wire order: iteration order unless SNAKEBRIDGE_SORT_SETS is on."""
+    if not _SORT_SETS or len(value) < 2:
+        return value
+    try:
+        return sorted(value, key=_set_sort_key)
+    except TypeError:
+        # If sorting fails, use unsorted
+        return value
 
 
 def _encode_tuple(value: tuple) -> Any:
     """Encode a tuple, checking for unencodable items."""
-    elements = []
-    for item in value:
-        enc = encode(item)
-        if isinstance(enc, dict) and enc.get("__needs_ref__"):
-            # Item needs ref - whole tuple needs ref
-            return {
-                "__needs_ref__": True,
-                "__type_name__": "tuple",
-                "__module__": "builtins",
-                "__reason__": f"contains unencodable item of type {enc.get('__type_name__')}",
-            }
-        if isinstance(enc, dict) and enc.get("__needs_stream_ref__"):
-            # Item needs stream ref - whole tuple needs ref
-            return {
-                "__needs_ref__": True,
-                "__type_name__": "tuple",
-                "__module__": "builtins",
-                "__reason__": f"contains iterator/generator",
-            }
-        elements.append(enc)
-    return _tag("tuple", {"elements": elements})
+    elements = _encode_elements(value, "tuple")
+    if type(elements) is _Ref:
+        return elements
+    if _COMPACT_CONTAINERS:
+        return [_COMPACT_TUPLE, *elements]
+    return {"__type__": "tuple", "elements": elements}
 
 
 def _encode_set(value: set) -> Any:
     """Encode a set, checking for unencodable items."""
-    elements = []
-    try:
-        sorted_values = sorted(value, key=lambda x: (type(x).__name__, str(x)))
-    except TypeError:
-        # If sorting fails, use unsorted
-        sorted_values = list(value)
-    for item in sorted_values:
-        enc = encode(item)
-        if isinstance(enc, dict) and enc.get("__needs_ref__"):
-            return {
-                "__needs_ref__": True,
-                "__type_name__": "set",
-                "__module__": "builtins",
-                "__reason__": f"contains unencodable item of type {enc.get('__type_name__')}",
-            }
-        if isinstance(enc, dict) and enc.get("__needs_stream_ref__"):
-            return {
-                "__needs_ref__": True,
-                "__type_name__": "set",
-                "__module__": "builtins",
-                "__reason__": f"contains iterator/generator",
-            }
-        elements.append(enc)
-    return _tag("set", {"elements": elements})
+    elements = _encode_elements(_set_items(value), "set")
+    if type(elements) is _Ref:
+        return elements
+    if _COMPACT_CONTAINERS:
+        return [_COMPACT_SET, *elements]
+    return {"__type__": "set", "elements": elements}
 
 
 def _encode_frozenset(value: frozenset) -> Any:
     """Encode a frozenset, checking for unencodable items."""
-    elements = []
-    try:
-        sorted_values = sorted(value, key=lambda x: (type(x).__name__, str(x)))
-    except TypeError:
-        # If sorting fails, use unsorted
-        sorted_values = list(value)
-    for item in sorted_values:
-        enc = encode(item)
-        if isinstance(enc, dict) and enc.get("__needs_ref__"):
-            return {
-                "__needs_ref__": True,
-                "__type_name__": "frozenset",
-                "__module__": "builtins",
-                "__reason__": f"contains unencodable item of type {enc.get('__type_name__')}",
-            }
-        if isinstance(enc, dict) and enc.get("__needs_stream_ref__"):
-            return {
-                "__needs_ref__": True,
-                "__type_name__": "frozenset",
-                "__module__": "builtins",
-                "__reason__": f"contains iterator/generator",
-            }
-        elements.append(enc)
-    return _tag("frozenset", {"elements": elements})
+    elements = _encode_elements(_set_items(value), "frozenset")
+    if type(elements) is _Ref:
+        return elements
+    if _COMPACT_CONTAINERS:
+        return [_COMPACT_FROZENSET, *elements]
+    return {"__type__": "frozenset", "elements": elements}
 
 
 def _encode_list(lst: list) -> Any:
@@ -265,27 +440,11 @@ def _encode_list(lst: list) -> Any:
     Encode a list, checking if any item needs ref-wrapping.
 
     If any item is unencodable (needs ref), the whole list needs ref-wrapping.
+    A list starting with a compact marker string is escaped with _COMPACT_LIST.
     """
-    encoded = []
-    for item in lst:
-        enc = encode(item)
-        if isinstance(enc, dict) and enc.get("__needs_ref__"):
-            # Item can't be encoded - whole list needs ref-wrapping
-            return {
-                "__needs_ref__": True,
-                "__type_name__": "list",
-                "__module__": "builtins",
-                "__reason__": f"contains unencodable item of type {enc.get('__type_name__')}",
-            }
-        if isinstance(enc, dict) and enc.get("__needs_stream_ref__"):
-            # Item is an iterator - whole list needs ref-wrapping
-            return {
-                "__needs_ref__": True,
-                "__type_name__": "list",
-                "__module__": "builtins",
-                "__reason__": "contains iterator/generator",
-            }
-        encoded.append(enc)
+    encoded = _encode_elements(lst, "list")
+    if encoded and type(encoded) is list and type(encoded[0]) is str and encoded[0] in _COMPACT_MARKERS:
+        return [_COMPACT_LIST, *encoded]
     return encoded
 
 
@@ -300,7 +459,8 @@ def _encode_dict(d: dict) -> Any:
     if not d:
         return {}
 
-    all_string_keys = all(isinstance(k, str) for k in d.keys())
+    # One C-level pass over the keys (map + isinstance), no generator frames
+    all_string_keys = all(map(isinstance, d, repeat(str)))
 
     if all_string_keys:
         return _encode_string_key_dict(d)
@@ -310,68 +470,164 @@ def _encode_dict(d: dict) -> Any:
 
 def _encode_string_key_dict(d: dict) -> Any:
     """Encode a dict with all string keys."""
+    value_types = set(map(type, d.values()))
+    if value_types <= _ENCODE_PASSTHROUGH:
+        return dict(d)
+    if value_types <= _ENCODE_SCALARS:
+        return {
+            k: v if type(v) is not float or v - v == 0.0 else _encode_float(v)
+            for k, v in d.items()
+        }
+    if any(map(_is_opaque_type, value_types)):
+        # As in _encode_elements: skip scalars, stop at the first failure's key
+        for k, v in d.items():
+            if type(v) in _ENCODE_SCALARS:
+                continue
+            enc_v = _encode_value(v)
+            if type(enc_v) is _Ref:
+                return _dict_value_ref(enc_v, k)
+
     encoded = {}
     for k, v in d.items():
-        enc_v = encode(v)
-        if isinstance(enc_v, dict) and enc_v.get("__needs_ref__"):
-            # Value can't be encoded - whole dict needs ref
-            return {
-                "__needs_ref__": True,
-                "__type_name__": "dict",
-                "__module__": "builtins",
-                "__reason__": f"contains unencodable value for key '{k}'",
-            }
-        if isinstance(enc_v, dict) and enc_v.get("__needs_stream_ref__"):
-            return {
-                "__needs_ref__": True,
-                "__type_name__": "dict",
-                "__module__": "builtins",
-                "__reason__": f"contains iterator/generator for key '{k}'",
-            }
+        enc_v = _encode_value(v)
+        if type(enc_v) is _Ref:
+            return _dict_value_ref(enc_v, k)
         encoded[k] = enc_v
     return encoded
 
 
+def _dict_value_ref(enc_v: "_Ref", key: str) -> "_Ref":
+    """Ref for a string-key dict whose value under key needed a ref."""
+    if enc_v.stream_type is None:
+        # Value can't be encoded - whole dict needs ref
+        return _Ref("dict", "builtins", f"contains unencodable value for key '{key}'")
+    return _Ref("dict", "builtins", f"contains iterator/generator for key '{key}'")
+
+
 def _encode_tagged_dict(d: dict) -> Any:
     """Encode a dict with non-string keys as tagged format."""
-    pairs = []
-    for k, v in d.items():
-        enc_k = encode(k)
-        enc_v = encode(v)
+    pairs = [None] * len(d)
+    for index, (k, v) in enumerate(d.items()):
+        enc_k = _encode_value(k)
+        enc_v = _encode_value(v)
 
         # If key or value needs ref, whole dict needs ref
-        if isinstance(enc_k, dict) and enc_k.get("__needs_ref__"):
-            return {
-                "__needs_ref__": True,
-                "__type_name__": "dict",
-                "__module__": "builtins",
-                "__reason__": "contains unencodable key",
-            }
-        if isinstance(enc_k, dict) and enc_k.get("__needs_stream_ref__"):
-            return {
-                "__needs_ref__": True,
-                "__type_name__": "dict",
-                "__module__": "builtins",
-                "__reason__": "key is iterator/generator",
-            }
-        if isinstance(enc_v, dict) and enc_v.get("__needs_ref__"):
-            return {
-                "__needs_ref__": True,
-                "__type_name__": "dict",
-                "__module__": "builtins",
-                "__reason__": "contains unencodable value",
-            }
-        if isinstance(enc_v, dict) and enc_v.get("__needs_stream_ref__"):
-            return {
-                "__needs_ref__": True,
-                "__type_name__": "dict",
-                "__module__": "builtins",
-                "__reason__": "value is iterator/generator",
-            }
+        if type(enc_k) is _Ref:
+            if enc_k.stream_type is None:
+                return _Ref("dict", "builtins", "contains unencodable key")
+            return _Ref("dict", "builtins", "key is iterator/generator")
+        if type(enc_v) is _Ref:
+            if enc_v.stream_type is None:
+                return _Ref("dict", "builtins", "contains unencodable value")
+            return _Ref("dict", "builtins", "value is iterator/generator")
+
+        pairs[index] = [enc_k, enc_v]
+
+    return {"__type__": "dict", "pairs": pairs}
+
+
+# Exact type -> encoder, consulted by encode() before the isinstance ladder.
+# JSON-safe primitives other than float are returned as-is before this lookup.
+_ENCODERS = {
+    float: _encode_float,
+    bytes: _encode_bytes,
+    bytearray: _encode_bytes,
+    Atom: _encode_atom,
+    tuple: _encode_tuple,
+    frozenset: _encode_frozenset,
+    set: _encode_set,
+    complex: _encode_complex,
+    datetime: _encode_datetime,
+    date: _encode_date,
+    time: _encode_time,
+    list: _encode_list,
+    dict: _encode_dict,
+}
+
+
+def _encode_passthrough(value: Any) -> Any:
+    """Subclasses of bool/int/str encode to themselves, like the base types."""
+    return value
+
+
+# (base type, encoder) in match order for subclasses: bool before int and
+# datetime before date, since the first match wins. Common subclasses
+# (IntEnum, str enums, namedtuple, OrderedDict/defaultdict) are checked first.
+_SUBCLASS_ENCODERS = (
+    (bool, _encode_passthrough),
+    (int, _encode_passthrough),
+    (str, _encode_passthrough),
+    (tuple, _encode_tuple),
+    (dict, _encode_dict),
+    (list, _encode_list),
+    (float, _encode_float),
+    ((bytes, bytearray), _encode_bytes),
+    (Atom, _encode_atom),
+    (frozenset, _encode_frozenset),
+    (set, _encode_set),
+    (complex, _encode_complex),
+    (datetime, _encode_datetime),
+    (date, _encode_date),
+    (time, _encode_time),
+)
+
+
+# Per-type caches below are plain dicts keyed by id(type): a lookup is a single
+# dict.get, where a WeakKeyDictionary would allocate a weakref on every call.
+# A weakref callback drops the entry when the type is collected, so runtime
+# classes are not kept alive and a recycled id never sees a stale entry.
+_TYPE_CACHE_REFS: Dict[Tuple[int, int], Any] = {}
+
+
+def _cache_type_entry(cache: Dict[int, Any], value_type: type, value: Any) -> None:
+    """Store value for value_type in an id-keyed per-type cache."""
+    key = id(value_type)
+    ref_key = (id(cache), key)
+    if ref_key not in _TYPE_CACHE_REFS:
+        def forget(_ref: Any) -> None:
+            cache.pop(key, None)
+            _TYPE_CACHE_REFS.pop(ref_key, None)
+
+        _TYPE_CACHE_REFS[ref_key] = weakref.ref(value_type, forget)
+    cache[key] = value
+
+
+# id(subclass) -> encoder resolved by _encode_slow. Kept apart from the fixed
+# _ENCODERS table; see _cache_type_entry for how entries are dropped.
+_RESOLVED_SUBCLASS_ENCODERS: Dict[int, Callable[[Any], Any]] = {}
+
+
+def _subclass_encoder(value_type: type) -> Any:
+    """Return the encoder for a subclass of a supported type, or None."""
+    for base, encoder in _SUBCLASS_ENCODERS:
+        if issubclass(value_type, base):
+            return encoder
+    return None
+
+
+# Base types _encode_slow can encode (None aside); instances of anything else
+# become refs.
+_ENCODABLE_BASES = (int, float, str, bytes, bytearray, Atom, tuple, frozenset, set, complex, date, time, list, dict)
+
+# id(type) -> whether its instances always need a ref (or stream ref)
+_OPAQUE_TYPES: Dict[int, bool] = {}
+
 
-        pairs.append([enc_k, enc_v])
+def _is_opaque_type(value_type: type) -> bool:
+    """Whether encode() can never encode instances of this type (cached)."""
+    opaque = _OPAQUE_TYPES.get(id(value_type))
+    if opaque is None:
+        opaque = value_type is not type(None) and not issubclass(value_type, _ENCODABLE_BASES)
+        _cache_type_entry(_OPAQUE_TYPES, value_type, opaque)
+    return opaque
 
-    return _tag("dict", {"pairs": pairs})
+
+# Resolved once rather than probing the types module on every check
+_ASYNC_GENERATOR_TYPE = getattr(types, "AsyncGeneratorType", None)
+
+# id(type) -> whether its instances are sync generators/iterators. The answer
+# only depends on the type, and unknown objects tend to repeat their type.
+_STREAMABLE_TYPES: Dict[int, bool] = {}
 
 
 def _is_generator_or_iterator(value: Any) -> bool:
@@ -381,30 +637,51 @@ def _is_generator_or_iterator(value: Any) -> bool:
     NOTE: Async generators are explicitly EXCLUDED because they cannot be consumed
     via sync iteration (next()). They should be treated as regular refs, not stream_refs.
     """
+    value_type = type(value)
+    streamable = _STREAMABLE_TYPES.get(id(value_type))
+    if streamable is None:
+        streamable = _probe_streamable(value_type)
+        _cache_type_entry(_STREAMABLE_TYPES, value_type, streamable)
+    return streamable
+
+
+def _probe_streamable(value_type: type) -> bool:
+    """Classify a type for _is_generator_or_iterator (uncached)."""
     # Explicitly exclude async generators - they cannot be consumed via next()
-    if hasattr(types, 'AsyncGeneratorType') and isinstance(value, types.AsyncGeneratorType):
+    if _ASYNC_GENERATOR_TYPE is not None and issubclass(value_type, _ASYNC_GENERATOR_TYPE):
         return False
-    if isinstance(value, types.GeneratorType):
+    if issubclass(value_type, types.GeneratorType):
         return True
-    # Check for iterator protocol
-    if hasattr(value, '__next__') and hasattr(value, '__iter__'):
+    # Check for iterator protocol (looked up on the type, like next() does)
+    if hasattr(value_type, '__next__') and hasattr(value_type, '__iter__'):
         # Exclude basic iterable types and context managers (file handles)
-        if isinstance(value, (str, bytes, bytearray, list, tuple, dict, set, frozenset)):
+        if issubclass(value_type, (str, bytes, bytearray, list, tuple, dict, set, frozenset)):
             return False
         # Prefer regular refs for context managers (e.g. file objects)
-        if hasattr(value, "__enter__") and hasattr(value, "__exit__"):
+        if hasattr(value_type, "__enter__") and hasattr(value_type, "__exit__"):
             return False
         return True
     return False
 
 
+# id(type) -> stream type reported by _get_stream_type, cached like
+# _STREAMABLE_TYPES since every stream ref of a type gets the same answer
+_STREAM_TYPES: Dict[int, str] = {}
+
+
 def _get_stream_type(value: Any) -> str:
-    """Determine stream type for iterator/generator."""
-    if isinstance(value, types.GeneratorType):
-        return "generator"
-    if hasattr(types, 'AsyncGeneratorType') and isinstance(value, types.AsyncGeneratorType):
-        return "async_generator"
-    return "iterator"
+    """Determine stream type for iterator/generator (cached per type)."""
+    value_type = type(value)
+    stream_type = _STREAM_TYPES.get(id(value_type))
+    if stream_type is None:
+        if issubclass(value_type, types.GeneratorType):
+            stream_type = "generator"
+        elif _ASYNC_GENERATOR_TYPE is not None and issubclass(value_type, _ASYNC_GENERATOR_TYPE):
+            stream_type = "async_generator"
+        else:
+            stream_type = "iterator"
+        _cache_type_entry(_STREAM_TYPES, value_type, stream_type)
+    return stream_type
 
 
 def encode_dict(d: Dict[Any, Any]) -> Dict[str, Any]:
@@ -423,7 +700,10 @@ def encode_dict(d: Dict[Any, Any]) -> Dict[str, Any]:
     Returns:
         Either a plain dict, a tagged dict with pairs, or __needs_ref__ marker
     """
-    return _encode_dict(d)
+    encoded = _encode_dict(d)
+    if type(encoded) is _Ref:
+        return encoded.to_marker()
+    return encoded
 
 
 def encode_dict_key(key: Any) -> str:
@@ -449,6 +729,143 @@ def encode_dict_key(key: Any) -> str:
         return repr(key)
 
 
+# Per-field encode expressions for compile_encoder, keyed by the declared type.
+# "{0}" is the field value; each expression matches what encode() returns for a
+# value of exactly that type.
+_INLINE_FIELD_ENCODERS = {
+    type(None): "{0}",
+    bool: "{0}",
+    int: "{0}",
+    str: "{0}",
+    float: "({0} if {0} - {0} == 0.0 else _encode_float({0}))",
+    bytes: "{{'__type__': 'bytes', 'data': _b64encode_str({0})}}",
+    bytearray: "{{'__type__': 'bytes', 'data': _b64encode_str({0})}}",
+    Atom: "{{'__type__': 'atom', 'value': {0}.value}}",
+    complex: "{{'__type__': 'complex', 'real': {0}.real, 'imag': {0}.imag}}",
+    datetime: "{{'__type__': 'datetime', 'value': {0}.isoformat()}}",
+    date: "{{'__type__': 'date', 'value': {0}.isoformat()}}",
+    time: "{{'__type__': 'time', 'value': {0}.isoformat()}}",
+}
+
+# Overrides for the SNAKEBRIDGE_COMPACT wire form
+_COMPACT_FIELD_ENCODERS = {
+    bytes: "[_COMPACT_BYTES, _b64encode_str({0})]",
+    bytearray: "[_COMPACT_BYTES, _b64encode_str({0})]",
+    complex: "[_COMPACT_COMPLEX, {0}.real, {0}.imag]",
+    datetime: "[_COMPACT_DATETIME, {0}.isoformat()]",
+    date: "[_COMPACT_DATE, {0}.isoformat()]",
+    time: "[_COMPACT_TIME, {0}.isoformat()]",
+}
+
+# Container types whose encoder may hand back a _Ref, which the compiled
+# encoder must turn into a marker for the whole value.
+_CONTAINER_FIELD_ENCODERS = {
+    tuple: "_encode_tuple",
+    set: "_encode_set",
+    frozenset: "_encode_frozenset",
+    list: "_encode_list",
+    dict: "_encode_dict",
+}
+
+_COMPILED_ENCODERS: Dict[Tuple[bool, Tuple[Tuple[str, type], ...]], Callable[[Any], Any]] = {}
+
+
+def compile_encoder(schema: Dict[str, type]) -> Callable[[Any], Any]:
+    """
+    Build an encoder specialized for dicts with a fixed field -> type schema.
+
+    Repeated calls with the same argument shape (the common RPC case) can skip
+    encode()'s isinstance dispatch: the returned function checks each field's
+    exact type and builds the encoded dict in a single literal. Values that do
+    not match the schema (missing/extra keys, other types, unencodable
+    container contents) fall back to encode(), so the result is always the
+    same as encode(value).
+
+    Encoders are cached per schema.
+
+    Args:
+        schema: Mapping of string field names to the exact type of each value
+            (None is accepted for NoneType)
+
+    Returns:
+        A function taking one value and returning its encoded form
+
+    Examples:
+        >>> enc = compile_encoder({"name": str, "data": bytes})
+        >>> enc({"name": "x", "data": b"hi"})
+        {'name': 'x', 'data': {'__type__': 'bytes', 'data': 'aGk='}}
+    """
+    signature = tuple(
+        (name, type(None) if field_type is None else field_type)
+        for name, field_type in schema.items()
+    )
+    key = (_COMPACT_CONTAINERS, signature)
+    encoder = _COMPILED_ENCODERS.get(key)
+    if encoder is None:
+        encoder = _build_encoder(signature)
+        _COMPILED_ENCODERS[key] = encoder
+    return encoder
+
+
+def _build_encoder(signature: Tuple[Tuple[str, type], ...]) -> Callable[[Any], Any]:
+    """Generate and exec the source for compile_encoder (uncached)."""
+    namespace = {
+        "encode": encode,
+        "_encode_value": _encode_value,
+        "_Ref": _Ref,
+        "_encode_float": _encode_float,
+        "_b64encode_str": _b64encode_str,
+        "_COMPACT_BYTES": _COMPACT_BYTES,
+        "_COMPACT_COMPLEX": _COMPACT_COMPLEX,
+        "_COMPACT_DATETIME": _COMPACT_DATETIME,
+        "_COMPACT_DATE": _COMPACT_DATE,
+        "_COMPACT_TIME": _COMPACT_TIME,
+    }
+    namespace.update({helper: globals()[helper] for helper in _CONTAINER_FIELD_ENCODERS.values()})
+    inline_encoders = _INLINE_FIELD_ENCODERS
+    if _COMPACT_CONTAINERS:
+        inline_encoders = {**_INLINE_FIELD_ENCODERS, **_COMPACT_FIELD_ENCODERS}
+
+    loads = []
+    guards = []
+    checks = []
+    items = []
+    for i, (name, field_type) in enumerate(signature):
+        if not isinstance(name, str):
+            raise TypeError(f"compile_encoder field names must be str, got {name!r}")
+        if not isinstance(field_type, type):
+            raise TypeError(f"compile_encoder field {name!r} needs a type, got {field_type!r}")
+        field = f"f{i}"
+        namespace[f"_t{i}"] = field_type
+        loads.append(f"        {field} = v[{name!r}]")
+        guards.append(f"type({field}) is not _t{i}")
+
+        if field_type in inline_encoders:
+            expr = inline_encoders[field_type].format(field)
+        else:
+            # Containers (and anything else) may come back as a ref marker
+            helper = _CONTAINER_FIELD_ENCODERS.get(field_type, "_encode_value")
+            checks.append(f"    e{i} = {helper}({field})")
+            checks.append(f"    if type(e{i}) is _Ref:")
+            checks.append("        return encode(v)")
+            expr = f"e{i}"
+        items.append(f"{name!r}: {expr}")
+
+    lines = [
+        "def _enc(v):",
+        f"    if type(v) is not dict or len(v) != {len(signature)}:",
+        "        return encode(v)",
+    ]
+    if signature:
+        lines += ["    try:", *loads, "    except KeyError:", "        return encode(v)"]
+        lines += [f"    if {' or '.join(guards)}:", "        return encode(v)"]
+    lines += checks
+    lines.append("    return {" + ", ".join(items) + "}")
+
+    exec(compile("\n".join(lines), "<snakebridge compiled encoder>", "exec"), namespace)
+    return namespace["_enc"]
+
+
 def decode(value: Any, session_id: str = None, context: Any = None) -> Any:
     """
     Decode a JSON value with __type__ tags back to Python values.
@@ -480,93 +897,232 @@ def decode(value: Any, session_id: str = None, context: Any = None) -> Any:
     if isinstance(value, (bool, int, float, str)):
         return value
 
-    # Handle list
+    # Handle list - walked iteratively so deep nesting costs no extra frames
     if isinstance(value, list):
-        return [decode(item, session_id=session_id, context=context) for item in value]
+        if not value:
+            return []
+        return _decode_nested(value, session_id, context)
 
     # Handle dict (check for __type__ tag)
     if isinstance(value, dict):
-        if "__type__" in value:
-            type_tag = value["__type__"]
-
-            if type_tag == "atom":
-                # Default: return plain string for library compatibility
-                # Opt-in to Atom class via SNAKEBRIDGE_ATOM_CLASS=true
-                atom_value = value.get("value", "")
-                if os.environ.get("SNAKEBRIDGE_ATOM_CLASS", "").lower() in (
-                    "true",
-                    "1",
-                    "yes",
-                ):
-                    return Atom(atom_value)
-                return atom_value
-
-            if type_tag == "tuple":
-                elements = value.get("elements") or value.get("value") or []
-                return tuple(decode(item, session_id=session_id, context=context) for item in elements)
-
-            elif type_tag == "set":
-                elements = value.get("elements") or value.get("value") or []
-                return set(decode(item, session_id=session_id, context=context) for item in elements)
-
-            elif type_tag == "frozenset":
-                elements = value.get("elements") or value.get("value") or []
-                return frozenset(decode(item, session_id=session_id, context=context) for item in elements)
-
-            elif type_tag == "bytes":
-                data = value.get("data") or value.get("value")
-                if data is None:
-                    return value
-                return base64.b64decode(data)
-
-            elif type_tag == "complex":
-                return complex(value["real"], value["imag"])
-
-            elif type_tag == "datetime":
-                return datetime.fromisoformat(value["value"])
-
-            elif type_tag == "date":
-                return date.fromisoformat(value["value"])
-
-            elif type_tag == "time":
-                return time.fromisoformat(value["value"])
-
-            elif type_tag == "special_float":
-                special = value.get("value")
-                if special == "infinity":
-                    return float("inf")
-                if special == "neg_infinity":
-                    return float("-inf")
-                if special == "nan":
-                    return float("nan")
-                return value
-
-            elif type_tag == "infinity":
-                return float("inf")
-
-            elif type_tag == "neg_infinity":
-                return float("-inf")
-
-            elif type_tag == "nan":
-                return float("nan")
-
-            elif type_tag == "callback":
-                return _decode_callback(value, session_id, context)
-
-            elif type_tag == "dict":
-                return decode_tagged_dict(value, session_id, context)
-
-            else:
-                # Unknown type tag, return as-is
-                return {k: decode(v, session_id=session_id, context=context) for k, v in value.items()}
-        else:
-            # Regular dict, decode recursively
-            return {k: decode(v, session_id=session_id, context=context) for k, v in value.items()}
+        if not value:
+            return {}
+        # One lookup: plain dicts (no tag) go straight to the nested walk
+        type_tag = value.get(_TYPE_KEY)
+        if type_tag is None:
+            return _decode_nested(value, session_id, context)
+
+        handler = _DECODERS.get(type_tag) if type(type_tag) is str else None
+        if handler is not None:
+            return handler(value, session_id, context)
+
+        # Unknown type tag, return as-is
+        return dict(zip(value, _decode_items(value.values(), session_id, context)))
 
     # Return as-is for any other type
     return value
 
 
+def _decode_atom(value: Dict[str, Any], session_id: str = None, context: Any = None) -> Any:
+    # Default: return plain string for library compatibility
+    # Opt-in to Atom class via SNAKEBRIDGE_ATOM_CLASS=true
+    atom_value = value.get("value", "")
+    if _ATOM_CLASS:
+        return Atom(atom_value)
+    # Atoms come from a small vocabulary (ok, error, field names); share one
+    # string object per name, as Atom does
+    if type(atom_value) is str:
+        return sys.intern(atom_value)
+    return atom_value
+
+
+def _tagged_elements(value: Dict[str, Any]) -> Any:
+    return value.get("elements") or value.get("value") or []
+
+
+def _decode_tuple(value: Dict[str, Any], session_id: str = None, context: Any = None) -> tuple:
+    return tuple(_decode_items(_tagged_elements(value), session_id, context))
+
+
+def _decode_set(value: Dict[str, Any], session_id: str = None, context: Any = None) -> set:
+    return set(_decode_items(_tagged_elements(value), session_id, context))
+
+
+def _decode_frozenset(value: Dict[str, Any], session_id: str = None, context: Any = None) -> frozenset:
+    return frozenset(_decode_items(_tagged_elements(value), session_id, context))
+
+
+def _decode_bytes(value: Dict[str, Any], session_id: str = None, context: Any = None) -> Any:
+    data = value.get("data") or value.get("value")
+    if data is None:
+        return value
+    return _b64decode(data)
+
+
+def _decode_complex(value: Dict[str, Any], session_id: str = None, context: Any = None) -> complex:
+    return complex(value["real"], value["imag"])
+
+
+def _decode_datetime(value: Dict[str, Any], session_id: str = None, context: Any = None) -> datetime:
+    return datetime.fromisoformat(value["value"])
+
+
+def _decode_date(value: Dict[str, Any], session_id: str = None, context: Any = None) -> date:
+    return date.fromisoformat(value["value"])
+
+
+def _decode_time(value: Dict[str, Any], session_id: str = None, context: Any = None) -> time:
+    return time.fromisoformat(value["value"])
+
+
+def _decode_special_float(value: Dict[str, Any], session_id: str = None, context: Any = None) -> Any:
+    special = value.get("value")
+    if special == "infinity":
+        return float("inf")
+    if special == "neg_infinity":
+        return float("-inf")
+    if special == "nan":
+        return float("nan")
+    return value
+
+
+# Legacy bare special-float tags
+def _decode_infinity(value: Dict[str, Any], session_id: str = None, context: Any = None) -> float:
+    return float("inf")
+
+
+def _decode_neg_infinity(value: Dict[str, Any], session_id: str = None, context: Any = None) -> float:
+    return float("-inf")
+
+
+def _decode_nan(value: Dict[str, Any], session_id: str = None, context: Any = None) -> float:
+    return float("nan")
+
+
+# Compact-form builders take the whole marker list. Scalar builders check the
+# arity and payload and return _NOT_COMPACT on a mismatch, so a plain list that
+# merely starts with a marker string decodes as a plain list (as in Elixir).
+_NOT_COMPACT = object()
+
+
+def _build_compact_list(value: list, session_id: str = None, context: Any = None) -> list:
+    return list(_decode_items(islice(value, 1, None), session_id, context))
+
+
+def _build_compact_tuple(value: list, session_id: str = None, context: Any = None) -> tuple:
+    return tuple(_decode_items(islice(value, 1, None), session_id, context))
+
+
+def _build_compact_set(value: list, session_id: str = None, context: Any = None) -> set:
+    return set(_decode_items(islice(value, 1, None), session_id, context))
+
+
+def _build_compact_frozenset(value: list, session_id: str = None, context: Any = None) -> frozenset:
+    return frozenset(_decode_items(islice(value, 1, None), session_id, context))
+
+
+def _build_compact_bytes(value: list, session_id: str = None, context: Any = None) -> Any:
+    if len(value) == 2 and type(value[1]) is str:
+        try:
+            return _b64decode(value[1])
+        except ValueError:
+            pass
+    return _NOT_COMPACT
+
+
+def _build_compact_complex(value: list, session_id: str = None, context: Any = None) -> Any:
+    if len(value) == 3 and type(value[1]) in (int, float) and type(value[2]) in (int, float):
+        return complex(value[1], value[2])
+    return _NOT_COMPACT
+
+
+def _compact_isoformat_builder(cls: type) -> Callable[..., Any]:
+    def build(value: list, session_id: str = None, context: Any = None) -> Any:
+        if len(value) == 2 and type(value[1]) is str:
+            try:
+                return cls.fromisoformat(value[1])
+            except ValueError:
+                pass
+        return _NOT_COMPACT
+
+    return build
+
+
+_COMPACT_BUILDERS = {
+    _COMPACT_LIST: _build_compact_list,
+    _COMPACT_TUPLE: _build_compact_tuple,
+    _COMPACT_SET: _build_compact_set,
+    _COMPACT_FROZENSET: _build_compact_frozenset,
+    _COMPACT_BYTES: _build_compact_bytes,
+    _COMPACT_COMPLEX: _build_compact_complex,
+    _COMPACT_DATETIME: _compact_isoformat_builder(datetime),
+    _COMPACT_DATE: _compact_isoformat_builder(date),
+    _COMPACT_TIME: _compact_isoformat_builder(time),
+}
+
+
+def _decode_compact(value: list, session_id: str = None, context: Any = None) -> Any:
+    """
+    Decode the compact ["\\x00tuple", ...] form of a container or tagged scalar.
+
+    Returns _NOT_COMPACT when the list does not have the marker's shape.
+    """
+    return _COMPACT_BUILDERS[value[0]](value, session_id, context)
+
+
+def _decode_items(items: Any, session_id: str = None, context: Any = None) -> Any:
+    """Lazily decode each item; map() keeps the per-item loop in C."""
+    if session_id is None and context is None:
+        return map(decode, items)
+    return map(partial(decode, session_id=session_id, context=context), items)
+
+
+def _decode_nested(value: Any, session_id: str = None, context: Any = None) -> Any:
+    """
+    Decode plain (untagged) lists and dicts without recursing per level.
+
+    Output containers are allocated up front and filled through an explicit
+    work stack of (parent, key, item) entries, so deeply nested Elixir maps and
+    lists do not cost one Python frame per level. Scalar children are written in
+    place without touching the stack, which keeps shallow inputs cheap. Tagged
+    values are handed back to decode().
+    """
+    root = [None]
+    stack = [(root, 0, value)]
+    push = stack.append
+    pop = stack.pop
+
+    while stack:
+        parent, key, item = pop()
+
+        if isinstance(item, list):
+            if item and type(item[0]) is str and item[0] in _COMPACT_BUILDERS:
+                decoded = _decode_compact(item, session_id, context)
+                if decoded is not _NOT_COMPACT:
+                    parent[key] = decoded
+                    continue
+            out = [None] * len(item)
+            parent[key] = out
+            for index, child in enumerate(item):
+                if type(child) in _DECODE_PASSTHROUGH:
+                    out[index] = child
+                else:
+                    push((out, index, child))
+        elif isinstance(item, dict) and item.get(_TYPE_KEY) is None:
+            # Pre-seed keys so the decoded dict keeps the input key order
+            out = dict.fromkeys(item)
+            parent[key] = out
+            for k, child in item.items():
+                if type(child) in _DECODE_PASSTHROUGH:
+                    out[k] = child
+                else:
+                    push((out, k, child))
+        else:
+            parent[key] = decode(item, session_id=session_id, context=context)
+
+    return root[0]
+
+
 def decode_tagged_dict(value: Dict[str, Any], session_id: str = None, context: Any = None) -> Dict[Any, Any]:
     """
     Decode a tagged dict with potentially non-string keys.
@@ -591,18 +1147,62 @@ def decode_tagged_dict(value: Dict[str, Any], session_id: str = None, context: A
     return result
 
 
+def _json_payload_bytes(payload: Any) -> bytes:
+    """
+    Serialize a callback payload to JSON bytes.
+
+    Callback ids are almost always plain strings or ints, which are written
+    directly (same output as json.dumps) without going through the encoder.
+    Other payloads use orjson when it is installed, else the stdlib encoder.
+    """
+    payload_type = type(payload)
+    if payload_type is str:
+        return encode_basestring_ascii(payload).encode("ascii")
+    if payload_type is int:
+        return str(payload).encode("ascii")
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload)
+        except orjson.JSONEncodeError:
+            # e.g. ints beyond 64 bits, which the stdlib encoder handles
+            pass
+    return json.dumps(payload).encode("utf-8")
+
+
+# Callback payloads travel as JSON wrapped in a StringValue-typed Any
+_ANY_TYPE_URL = "type.googleapis.com/google.protobuf.StringValue"
+
+
+def _encode_any_json(payload: Any):
+    any_message = _callback_bridge_modules()[2]
+    # One constructor call instead of two field setters
+    return any_message(type_url=_ANY_TYPE_URL, value=_json_payload_bytes(payload))
+
+
+# (ExecuteElixirToolRequest, TypeSerializer, Any), resolved on the first callback
+_CALLBACK_BRIDGE = None
+
+
+def _callback_bridge_modules():
+    """Resolve the callback bridge classes once instead of importing per call."""
+    global _CALLBACK_BRIDGE
+
+    if _CALLBACK_BRIDGE is None:
+        try:
+            from google.protobuf.any_pb2 import Any as AnyMessage
+            from snakepit_bridge_pb2 import ExecuteElixirToolRequest
+            from snakepit_bridge.serialization import TypeSerializer
+        except Exception as exc:
+            raise RuntimeError(f"Callback bridge unavailable: {exc}") from exc
+        _CALLBACK_BRIDGE = (ExecuteElixirToolRequest, TypeSerializer, AnyMessage)
+
+    return _CALLBACK_BRIDGE
+
+
 def _decode_callback(value: Dict[str, Any], session_id: str, context: Any):
     callback_id = value.get("ref_id") or value.get("callback_id")
     arity = value.get("arity")
 
-    def _encode_any_json(payload):
-        from google.protobuf import any_pb2
-
-        any_value = any_pb2.Any()
-        any_value.type_url = "type.googleapis.com/google.protobuf.StringValue"
-        any_value.value = json.dumps(payload).encode("utf-8")
-        return any_value
-
     def _callback(*args):
         if arity is not None and len(args) != arity:
             raise TypeError(f"Callback expected arity {arity}, got {len(args)}")
@@ -613,11 +1213,7 @@ def _decode_callback(value: Dict[str, Any], session_id: str, context: Any):
         callback_session_id = session_id or getattr(context, "session_id", None) or "default"
         encoded_args = [encode(arg) for arg in args]
 
-        try:
-            from snakepit_bridge_pb2 import ExecuteElixirToolRequest
-            from snakepit_bridge.serialization import TypeSerializer
-        except Exception as exc:
-            raise RuntimeError(f"Callback bridge unavailable: {exc}") from exc
+        ExecuteElixirToolRequest, TypeSerializer, _ = _callback_bridge_modules()
 
         request = ExecuteElixirToolRequest(
             session_id=callback_session_id,
@@ -637,7 +1233,7 @@ def _decode_callback(value: Dict[str, Any], session_id: str, context: Any):
         binary_result = getattr(response, "binary_result", None) or None
         result = TypeSerializer.decode_any(response.result, binary_result)
 
-        if isinstance(result, dict) and result.get("__type__") == "callback_error":
+        if isinstance(result, dict) and result.get(_TYPE_KEY) == "callback_error":
             raise RuntimeError(result.get("reason", "callback_error"))
 
         return decode(result, session_id=callback_session_id, context=context)
@@ -645,6 +1241,27 @@ def _decode_callback(value: Dict[str, Any], session_id: str, context: Any):
     return _callback
 
 
+# __type__ tag -> decoder(value, session_id, context), consulted by decode().
+# Unknown tags fall back to decoding the dict's values.
+_DECODERS = {
+    "atom": _decode_atom,
+    "tuple": _decode_tuple,
+    "set": _decode_set,
+    "frozenset": _decode_frozenset,
+    "bytes": _decode_bytes,
+    "complex": _decode_complex,
+    "datetime": _decode_datetime,
+    "date": _decode_date,
+    "time": _decode_time,
+    "special_float": _decode_special_float,
+    "infinity": _decode_infinity,
+    "neg_infinity": _decode_neg_infinity,
+    "nan": _decode_nan,
+    "callback": _decode_callback,
+    "dict": decode_tagged_dict,
+}
+
+
 # Convenience functions for common operations
 def encode_args(args: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -656,7 +1273,11 @@ def encode_args(args: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dictionary with encoded values
     """
-    return {name: encode(value) for name, value in args.items()}
+    # Scalar arguments (the common case) skip the encode() call entirely
+    return {
+        name: value if type(value) in _ENCODE_PASSTHROUGH else encode(value)
+        for name, value in args.items()
+    }
 
 
 def decode_args(args: Dict[str, Any]) -> Dict[str, Any]:
@@ -669,7 +1290,10 @@ def decode_args(args: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dictionary with decoded values
     """
-    return {name: decode(value) for name, value in args.items()}
+    return {
+        name: value if type(value) in _DECODE_PASSTHROUGH else decode(value)
+        for name, value in args.items()
+    }
 
 
 def encode_result(result: Any) -> Dict[str, Any]:
@@ -684,7 +1308,9 @@ def encode_result(result: Any) -> Dict[str, Any]:
     """
     return {
         "success": True,
-        "result": encode(result)
+        "__schema__": SCHEMA_VERSION,
+        # JSON scalars are already their own encoding
+        "result": result if type(result) in _ENCODE_PASSTHROUGH else encode(result),
     }
 
 
@@ -700,6 +1326,7 @@ def encode_error(error: Exception) -> Dict[str, Any]:
     """
     return {
         "success": False,
+        "__schema__": SCHEMA_VERSION,
         "error": str(error),
         "error_type": type(error).__name__
     }
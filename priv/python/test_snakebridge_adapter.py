@@ -16,9 +16,8 @@ from snakebridge_adapter import (
     _instance_registry,
     _resolve_ref,
     _is_json_safe,
-    _registry_key_prefix,
 )
-from snakebridge_types import Atom, SCHEMA_VERSION
+from snakebridge_types import Atom
 
 
 class CustomObject:
@@ -161,14 +160,27 @@ class TestEncodeResultGraceful:
         session_id = ref_payload["session_id"]
 
         # Verify registry contains the object
-        key = f"{session_id}:{ref_id}"
-        assert key in _instance_registry
+        assert ref_id in _instance_registry[session_id]
 
         # Resolve and verify identity
         resolved = _resolve_ref(ref_payload, session_id)
         assert resolved is obj
         assert resolved.value == 999
 
+    def test_registry_count_tracks_entries(self):
+        """The running ref count should match the registry through store/release."""
+        from snakebridge_adapter import _registry_size, _release_ref, _release_session
+
+        def actual():
+            return sum(map(len, _instance_registry.values()))
+
+        refs = encode_result([CustomObject(), CustomObject()], "count-session", "test", "test")
+        assert _registry_size() == actual()
+        assert _release_ref(refs[0], "count-session")
+        assert _registry_size() == actual()
+        assert _release_session("count-session") == 1
+        assert _registry_size() == actual()
+
     def test_deeply_nested_custom_object(self):
         """Deeply nested custom objects should become refs at correct depth."""
         obj = CustomObject()
@@ -287,6 +299,18 @@ class TestEncodeResultGraceful:
             result = encode_result(case, "test-session", "test", "test")
             assert _is_json_safe(result), f"Result not JSON-safe for {case}"
 
+    def test_skipping_safety_check_keeps_output(self):
+        """SNAKEBRIDGE_SKIP_JSON_SAFETY_CHECK should not change encoded results."""
+        import snakebridge_adapter
+
+        value = {"a": [1, 2.5, None], "b": (b"hi", {3})}
+        expected = encode_result(value, "test-session", "test", "test")
+        snakebridge_adapter.SKIP_JSON_SAFETY_CHECK = True
+        try:
+            assert encode_result(value, "test-session", "test", "test") == expected
+        finally:
+            snakebridge_adapter.SKIP_JSON_SAFETY_CHECK = False
+
     def test_empty_containers(self):
         """Empty containers should encode correctly."""
         assert encode_result([], "test", "test", "test") == []
@@ -319,6 +343,65 @@ class TestEncodeResultGraceful:
         assert result.get("__type__") == "datetime"
         assert "2024-01-15" in result.get("value", "")
 
+    def test_builtin_subclasses_encode_like_base(self):
+        """Subclasses of builtins should encode like their base type, every time."""
+        from collections import OrderedDict
+        from enum import IntEnum
+
+        class Color(IntEnum):
+            RED = 1
+
+        class Tags(list):
+            pass
+
+        for _ in range(2):
+            assert encode_result([Color.RED], "test", "test", "test") == [1]
+            assert encode_result(Tags([1, b"x"]), "test", "test", "test")[1]["__type__"] == "bytes"
+            assert encode_result(OrderedDict(a=(1,)), "test", "test", "test") == {
+                "a": {"__type__": "tuple", "elements": [1]}
+            }
+
+    def test_runtime_classes_not_pinned(self):
+        """Handlers cached for classes made at runtime must not keep them alive."""
+        import gc
+        import weakref
+        import snakebridge_adapter
+
+        Dynamic = type("Dynamic", (tuple,), {})
+        assert encode_result(Dynamic((1,)), "test", "test", "test")["elements"] == [1]
+        key = id(Dynamic)
+        assert key in snakebridge_adapter._RESOLVED_RESULT_ENCODERS
+        ref = weakref.ref(Dynamic)
+        del Dynamic
+        gc.collect()
+        assert ref() is None
+        assert key not in snakebridge_adapter._RESOLVED_RESULT_ENCODERS
+
+    def test_compact_results(self):
+        """SNAKEBRIDGE_COMPACT applies to results too, and decodes back."""
+        import snakebridge_adapter
+        from datetime import date
+        from snakebridge_types import decode
+
+        value = [(1, 2), b"hi", date(2024, 1, 2), {"s": frozenset([3])}]
+        snakebridge_adapter._COMPACT_CONTAINERS = True
+        try:
+            result = encode_result(value, "test", "test", "test")
+        finally:
+            snakebridge_adapter._COMPACT_CONTAINERS = False
+        assert result[:3] == [["\x00tuple", 1, 2], ["\x00bytes", "aGk="], ["\x00date", "2024-01-02"]]
+        assert _is_json_safe(result)
+        assert decode(result) == value
+
+    def test_marker_led_result_lists_are_escaped(self):
+        """A result list starting with a marker string should stay a list."""
+        from snakebridge_types import decode
+
+        value = ["\x00set", [1]]
+        result = encode_result({"v": value}, "test", "test", "test")
+        assert result == {"v": ["\x00list", "\x00set", [1]]}
+        assert decode(result) == {"v": value}
+
 
 class TestEncodeResultRefMetadata:
     """Test that ref payloads include required metadata."""
@@ -467,8 +550,7 @@ class TestRecursionErrorFallback:
 
         # Count refs for our specific session before
         def count_session_refs():
-            prefix = _registry_key_prefix(test_session)
-            return sum(1 for k in _instance_registry.keys() if k.startswith(prefix))
+            return len(_instance_registry.get(test_session, ()))
 
         initial_count = count_session_refs()
 
@@ -661,7 +743,7 @@ class TestAtomEncoding:
         assert isinstance(result, dict)
         assert result.get("__type__") == "atom"
         assert result.get("value") == "ok"
-        assert result.get("__schema__") == SCHEMA_VERSION
+        assert "__schema__" not in result
 
     def test_atom_in_list_encodes_correctly(self):
         """Atom nested in a list should encode as tagged atom."""
@@ -5,15 +5,26 @@ These tests verify that non-JSON-serializable values are properly marked
 with __needs_ref__ or __needs_stream_ref__ markers.
 """
 
+import json
 import math
 import sys
 import os
 import tempfile
+from datetime import date, datetime, time
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from snakebridge_types import encode, _is_generator_or_iterator, _get_stream_type
+import snakebridge_types
+from snakebridge_types import (
+    Atom,
+    compile_encoder,
+    encode,
+    decode,
+    _is_generator_or_iterator,
+    _get_stream_type,
+    _json_payload_bytes,
+)
 from snakebridge_adapter import _is_json_safe
 
 
@@ -29,6 +40,47 @@ class TestEncodeRefSafety:
         assert result.get("__needs_ref__") is True
         assert result.get("__type_name__") == "MyClass"
 
+    def test_reason_names_first_failing_item(self):
+        """The ref reason should describe the first item that fails, in order."""
+        class Opaque:
+            pass
+
+        o = Opaque()
+        assert encode({"a": [o], "b": o})["__reason__"] == "contains unencodable value for key 'a'"
+        assert encode([1, [o], iter([])])["__reason__"] == "contains unencodable item of type list"
+
+    def test_subclass_encoders_do_not_grow_dispatch_table(self):
+        """Encoding a builtin subclass should not add it to _ENCODERS or pin it."""
+        import gc
+        import weakref
+
+        Pair = type("Pair", (tuple,), {})
+        size = len(snakebridge_types._ENCODERS)
+        assert encode(Pair((1, 2))) == {"__type__": "tuple", "elements": [1, 2]}
+        assert len(snakebridge_types._ENCODERS) == size
+        key = id(Pair)
+        assert key in snakebridge_types._RESOLVED_SUBCLASS_ENCODERS
+        ref = weakref.ref(Pair)
+        del Pair
+        gc.collect()
+        assert ref() is None
+        assert key not in snakebridge_types._RESOLVED_SUBCLASS_ENCODERS
+
+    def test_ref_type_caches_do_not_pin_classes(self):
+        """Encoding instances of a runtime class should not keep the class alive."""
+        import gc
+        import weakref
+
+        MyClass = type("MyClass", (), {})
+        assert encode([MyClass()]).get("__needs_ref__") is True
+        key = id(MyClass)
+        assert key in snakebridge_types._OPAQUE_TYPES
+        ref = weakref.ref(MyClass)
+        del MyClass
+        gc.collect()
+        assert ref() is None
+        assert key not in snakebridge_types._OPAQUE_TYPES
+
     def test_lambda_needs_ref(self):
         """Lambda functions should need refs."""
         fn = lambda x: x + 1
@@ -175,6 +227,39 @@ class TestEncodeSafeValues:
         """Empty dict should pass through."""
         assert encode({}) == {}
 
+    def test_scalar_containers(self):
+        """Scalar-only lists and dicts should encode to new, equal containers."""
+        items = [1, "a", None, True]
+        assert encode(items) == items and encode(items) is not items
+        assert encode([1.5, float("inf")]) == [1.5, {"__type__": "special_float", "value": "infinity"}]
+        values = {"a": 1, "b": float("nan")}
+        assert encode(values) == {"a": 1, "b": {"__type__": "special_float", "value": "nan"}}
+
+    def test_marker_lookalike_values(self):
+        """User dicts that look like ref markers should encode as plain data."""
+        lookalike = {"__needs_ref__": True}
+        assert encode([lookalike]) == [lookalike]
+        assert encode({"k": lookalike, "n": (1, 2)})["k"] == lookalike
+
+    def test_builtin_subclasses(self):
+        """Subclasses of supported types should encode like their base type."""
+        from collections import OrderedDict, namedtuple
+
+        Point = namedtuple("Point", "x y")
+        assert encode(Point(1, 2)) == encode((1, 2))
+        assert encode(OrderedDict(a=1)) == {"a": 1}
+        assert encode(type("Name", (str,), {})("x")) == "x"
+
+    def test_subclass_encoding_is_repeatable(self):
+        """Repeated subclass instances should encode the same way each time."""
+        from enum import IntEnum
+
+        class Color(IntEnum):
+            RED = 1
+
+        for _ in range(2):
+            assert encode([Color.RED, (Color.RED,)]) == [1, {"__type__": "tuple", "elements": [1]}]
+
 
 class TestSpecialFloats:
     """Test special float handling."""
@@ -219,6 +304,22 @@ class TestTaggedTypes:
         assert result.get("__type__") == "set"
         assert sorted(result.get("elements")) == [1, 2, 3]
 
+    def test_schema_only_on_envelope(self):
+        """Tagged values omit __schema__; the result envelope carries it."""
+        result = snakebridge_types.encode_result((b"x", 1.5j))
+        assert result["__schema__"] == snakebridge_types.SCHEMA_VERSION
+        assert "__schema__" not in result["result"]
+        assert all("__schema__" not in item for item in result["result"]["elements"])
+
+    def test_sorted_sets_option(self):
+        """SNAKEBRIDGE_SORT_SETS should sort set elements by type name, then str."""
+        snakebridge_types._SORT_SETS = True
+        try:
+            assert encode({"b", 2, "a", 1})["elements"] == [1, 2, "a", "b"]
+            assert encode(frozenset([3, 1, 2]))["elements"] == [1, 2, 3]
+        finally:
+            snakebridge_types._SORT_SETS = False
+
     def test_frozenset(self):
         """Frozenset should be tagged."""
         result = encode(frozenset([1, 2, 3]))
@@ -301,6 +402,13 @@ class TestIsJsonSafe:
         assert _is_json_safe({"__type__": "tuple", "__schema__": 1, "elements": [1, 2]})
         assert _is_json_safe({"__type__": "ref", "id": "abc123", "session_id": "test"})
 
+    def test_deep_nesting_checked_without_recursion(self):
+        """Nesting past the recursion limit is still checked, down to the leaf."""
+        value = [float('nan')]
+        for _ in range(sys.getrecursionlimit() * 2):
+            value = {"v": [value]}
+        assert not _is_json_safe(value)
+
 
 class TestGeneratorIteratorDetection:
     """Test generator/iterator detection helpers."""
@@ -325,6 +433,227 @@ class TestGeneratorIteratorDetection:
         """List should not be detected as iterator."""
         assert not _is_generator_or_iterator([1, 2, 3])
 
+    def test_cache_does_not_pin_runtime_classes(self):
+        """The per-type answer cache should not keep dynamic classes alive."""
+        import gc
+        import weakref
+
+        Counter = type("Counter", (), {"__iter__": lambda self: self, "__next__": lambda self: 1})
+        assert _is_generator_or_iterator(Counter())
+        key = id(Counter)
+        assert key in snakebridge_types._STREAMABLE_TYPES
+        ref = weakref.ref(Counter)
+        del Counter
+        gc.collect()
+        assert ref() is None
+        assert key not in snakebridge_types._STREAMABLE_TYPES
+
+    def test_stream_type_cached_per_type(self):
+        """_get_stream_type answers from its per-type cache on repeat calls."""
+        gen = (i for i in range(3))
+        assert _get_stream_type(gen) == "generator"
+        assert snakebridge_types._STREAM_TYPES[id(type(gen))] == "generator"
+        assert _get_stream_type(iter([1])) == "iterator"
+        assert _get_stream_type((i for i in range(1))) == "generator"
+
+
+class TestAtom:
+    """Test the Atom value type."""
+
+    def test_equality_and_hash(self):
+        """Atoms with the same name should be equal and hash alike."""
+        assert Atom("ok") == Atom("ok")
+        assert Atom("ok") != Atom("error")
+        assert Atom("ok") != "ok"
+        assert len({Atom("ok"), Atom("ok")}) == 1
+
+    def test_value_is_interned(self):
+        """Atom names should be interned strings."""
+        name = "".join(["snake", "bridge"])
+        assert Atom(name).value is Atom("snakebridge").value
+
+    def test_non_string_value(self):
+        """Non-string values should be converted to strings."""
+        assert Atom(42).value == "42"
+
+    def test_match_args(self):
+        """Atoms should expose value for positional pattern matching."""
+        assert Atom.__match_args__ == ("value",)
+
+
+class TestDecode:
+    """Test decoding of plain and tagged values."""
+
+    def test_plain_containers(self):
+        """Plain lists and dicts should decode to equal values."""
+        payload = {"a": [1, 2, {"b": None}], "c": "text", "d": 1.5}
+        assert decode(payload) == payload
+
+    def test_tagged_values_inside_containers(self):
+        """Tagged values nested in plain containers should be decoded."""
+        payload = {
+            "pair": {"__type__": "tuple", "__schema__": 1, "elements": [1, 2]},
+            "items": [{"__type__": "bytes", "__schema__": 1, "data": "aGVsbG8="}],
+        }
+        assert decode(payload) == {"pair": (1, 2), "items": [b"hello"]}
+
+    def test_dict_key_order_preserved(self):
+        """Decoded dicts should keep the input key order."""
+        payload = {"z": {"x": 1}, "a": 2, "m": [3]}
+        assert list(decode(payload).keys()) == ["z", "a", "m"]
+
+    def test_unknown_type_tags(self):
+        """Unknown or non-string tags should decode the dict's values."""
+        for tag in ["mystery", ["not", "hashable"]]:
+            payload = {"__type__": tag, "v": {"__type__": "tuple", "elements": [1]}}
+            assert decode(payload) == {"__type__": tag, "v": (1,)}
+
+    def test_atom_decoding(self):
+        """Atoms decode to strings unless the Atom class is enabled."""
+        payload = {"__type__": "atom", "value": "ok"}
+        saved = snakebridge_types._ATOM_CLASS
+        try:
+            snakebridge_types._ATOM_CLASS = False
+            assert decode(payload) == "ok"
+            assert decode(json.loads('{"__type__": "atom", "value": "some_long_atom"}')) is sys.intern("some_long_atom")
+            snakebridge_types._ATOM_CLASS = True
+            assert decode(payload) == Atom("ok")
+        finally:
+            snakebridge_types._ATOM_CLASS = saved
+
+    def test_null_type_key_is_plain_dict(self):
+        """A dict whose __type__ is null should decode as a plain dict."""
+        payload = {"__type__": None, "a": [1, {"__type__": None}]}
+        assert decode(payload) == payload
+
+    def test_deeply_nested_structure(self):
+        """Nesting deeper than the recursion limit should decode without error."""
+        depth = sys.getrecursionlimit() + 100
+        payload = [1]
+        current = payload
+        for _ in range(depth):
+            child = {"next": [1]}
+            current.append(child)
+            current = child["next"]
+
+        result = decode(payload)
+        for _ in range(depth):
+            assert result[0] == 1
+            result = result[1]["next"]
+        assert result == [1]
+
+
+class TestCompactContainers:
+    """Test the opt-in compact tuple/set wire form."""
+
+    def test_compact_encoding(self):
+        """Tuples and sets should encode as marker lists in compact mode."""
+        snakebridge_types._COMPACT_CONTAINERS = True
+        try:
+            assert encode((1, (2, 3))) == ["\x00tuple", 1, ["\x00tuple", 2, 3]]
+            assert encode({1}) == ["\x00set", 1]
+            assert encode(frozenset()) == ["\x00frozenset"]
+        finally:
+            snakebridge_types._COMPACT_CONTAINERS = False
+
+    def test_compact_decoding(self):
+        """Marker lists should decode regardless of the compact setting."""
+        payload = {"pair": ["\x00tuple", 1, ["\x00set", 2]], "plain": ["tuple", 1]}
+        assert decode(payload) == {"pair": (1, {2}), "plain": ["tuple", 1]}
+        assert decode(["\x00frozenset", 1, 2]) == frozenset([1, 2])
+
+    def test_compact_scalars_round_trip(self):
+        """Tagged scalar types should use marker lists in compact mode too."""
+        values = [b"hi", complex(1, -2), datetime(2024, 1, 2, 3, 4, 5), date(2024, 1, 2), time(3, 4)]
+        snakebridge_types._COMPACT_CONTAINERS = True
+        try:
+            encoded = encode(values)
+            compiled = compile_encoder({"data": bytes, "when": date})({"data": b"hi", "when": date(2024, 1, 2)})
+        finally:
+            snakebridge_types._COMPACT_CONTAINERS = False
+        assert encoded[0] == ["\x00bytes", "aGk="]
+        assert encoded[1] == ["\x00complex", 1.0, -2.0]
+        assert encoded[3] == ["\x00date", "2024-01-02"]
+        assert compiled == {"data": ["\x00bytes", "aGk="], "when": ["\x00date", "2024-01-02"]}
+        assert decode(json.loads(json.dumps(encoded))) == values
+
+    def test_malformed_compact_scalars_stay_lists(self):
+        """Marker lists with the wrong arity or payload decode as plain lists."""
+        assert decode(["\x00bytes", "aGk=", "x"]) == ["\x00bytes", "aGk=", "x"]
+        assert decode(["\x00bytes"]) == ["\x00bytes"]
+        assert decode(["\x00complex", "1", 2]) == ["\x00complex", "1", 2]
+        assert decode({"k": ["\x00date", "bad"]}) == {"k": ["\x00date", "bad"]}
+
+    def test_marker_led_lists_are_escaped(self):
+        """Plain lists starting with a marker string should round-trip as lists."""
+        values = [["\x00set", [1]], ["\x00list"], ("\x00set",), {"k": ["\x00bytes", "aGk="]}]
+        encoded = encode(values)
+        assert encoded[0] == ["\x00list", "\x00set", [1]]
+        assert encoded[1] == ["\x00list", "\x00list"]
+        assert decode(json.loads(json.dumps(encoded))) == values
+        snakebridge_types._COMPACT_CONTAINERS = True
+        try:
+            encoded = encode(values)
+        finally:
+            snakebridge_types._COMPACT_CONTAINERS = False
+        assert encoded[2] == ["\x00tuple", "\x00set"]
+        assert decode(encoded) == values
+
+
+class TestCallbackPayloads:
+    """Test JSON serialization of callback payloads."""
+
+    def test_scalar_ids_match_json_dumps(self):
+        """String and int ids should serialize exactly like json.dumps."""
+        for payload in ["cb-1", 'quote"back\\slash', "caf\u00e9\n", "", 42, -7]:
+            assert _json_payload_bytes(payload) == json.dumps(payload).encode("utf-8")
+
+    def test_structured_payload(self):
+        """Structured payloads should round-trip through JSON."""
+        payload = [1, {"__type__": "tuple", "elements": [True, None]}]
+        assert json.loads(_json_payload_bytes(payload)) == payload
+
+    def test_big_int_payload(self):
+        """Ints beyond 64 bits should still serialize."""
+        payload = [2 ** 70, "x"]
+        assert json.loads(_json_payload_bytes(payload)) == payload
+
+
+class TestCompileEncoder:
+    """Test schema-specialized encoders."""
+
+    def test_matches_encode(self):
+        """Compiled output should equal encode() for matching values."""
+        enc = compile_encoder({"name": str, "shape": tuple, "data": bytes, "scale": float, "tag": None})
+        value = {"name": "t", "shape": (2, 3), "data": b"\x00\xff", "scale": float("inf"), "tag": None}
+        assert enc(value) == encode(value)
+
+    def test_cached_per_schema(self):
+        """Same schema should return the same compiled function."""
+        assert compile_encoder({"a": int, "b": str}) is compile_encoder({"a": int, "b": str})
+
+    def test_falls_back_on_mismatch(self):
+        """Values that don't fit the schema should encode like encode()."""
+        enc = compile_encoder({"n": int, "items": list})
+        for value in [{"n": True, "items": []}, {"n": 1}, {"n": 1, "items": [], "x": 2}, (1, 2), {1: 2, 3: 4}]:
+            assert enc(value) == encode(value)
+
+    def test_unencodable_field_needs_ref(self):
+        """An unencodable container field should mark the whole dict."""
+        enc = compile_encoder({"n": int, "items": list})
+        result = enc({"n": 1, "items": [object()]})
+        assert result["__needs_ref__"] is True
+        assert result["__type_name__"] == "dict"
+
+    def test_rejects_bad_schema(self):
+        """Field names must be strings and types must be classes."""
+        for schema in [{1: int}, {"a": "int"}]:
+            try:
+                compile_encoder(schema)
+            except TypeError:
+                continue
+            raise AssertionError(f"expected TypeError for {schema!r}")
+
 
 # Simple test runner for when pytest is not available
 def run_tests():
@@ -339,29 +668,40 @@ def run_tests():
         TestTaggedDict,
         TestIsJsonSafe,
         TestGeneratorIteratorDetection,
+        TestAtom,
+        TestDecode,
+        TestCompactContainers,
+        TestCallbackPayloads,
+        TestCompileEncoder,
     ]
 
     total = 0
     passed = 0
     failed = 0
 
-    for test_class in test_classes:
-        instance = test_class()
-        for name in dir(instance):
-            if name.startswith('test_'):
-                total += 1
-                try:
-                    getattr(instance, name)()
-                    passed += 1
-                    print(f"  PASS: {test_class.__name__}.{name}")
-                except AssertionError as e:
-                    failed += 1
-                    print(f"  FAIL: {test_class.__name__}.{name}")
-                    print(f"        {e}")
-                except Exception as e:
-                    failed += 1
-                    print(f"  ERROR: {test_class.__name__}.{name}")
-                    traceback.print_exc()
+    # Test classes define their tests directly, so the class dicts (in
+    # definition order) cover everything dir() would find
+    tests = [
+        (test_class, name, fn)
+        for test_class in test_classes
+        for name, fn in vars(test_class).items()
+        if name.startswith('test_') and callable(fn)
+    ]
+
+    for test_class, name, fn in tests:
+        total += 1
+        try:
+            fn(test_class())
+            passed += 1
+            print(f"  PASS: {test_class.__name__}.{name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"  FAIL: {test_class.__name__}.{name}")
+            print(f"        {e}")
+        except Exception as e:
+            failed += 1
+            print(f"  ERROR: {test_class.__name__}.{name}")
+            traceback.print_exc()
 
     print(f"\n{'=' * 60}")
     print(f"Results: {passed}/{total} passed, {failed} failed")
@@ -48,6 +48,68 @@ def extract_type_info(obj) -> dict:
     }
 
 
+# Builtin types that serialize to a bare {"type": name}
+_TYPE_MAP = {
+    int: "int",
+    float: "float",
+    bool: "bool",
+    str: "str",
+    bytes: "bytes",
+    list: "list",
+    dict: "dict",
+    set: "set",
+    tuple: "tuple",
+}
+
+
+def _serialize_list(args) -> dict:
+    if args:
+        return {"type": "list", "element_type": serialize_type(args[0])}
+    return {"type": "list"}
+
+
+def _serialize_dict(args) -> dict:
+    if len(args) == 2:
+        return {
+            "type": "dict",
+            "key_type": serialize_type(args[0]),
+            "value_type": serialize_type(args[1])
+        }
+    return {"type": "dict"}
+
+
+def _serialize_set(args) -> dict:
+    if args:
+        return {"type": "set", "element_type": serialize_type(args[0])}
+    return {"type": "set"}
+
+
+def _serialize_tuple(args) -> dict:
+    if args:
+        if len(args) == 2 and args[1] is ...:
+            return {"type": "tuple", "element_type": serialize_type(args[0]), "variadic": True}
+        return {"type": "tuple", "element_types": [serialize_type(a) for a in args]}
+    return {"type": "tuple"}
+
+
+def _serialize_union(args) -> dict:
+    if len(args) == 2 and type(None) in args:
+        # Optional[T]
+        non_none = [a for a in args if a is not type(None)][0]
+        return {"type": "optional", "inner_type": serialize_type(non_none)}
+    return {"type": "union", "types": [serialize_type(a) for a in args]}
+
+
+# Typing generics, keyed on get_origin()
+_ORIGIN_HANDLERS = {
+    list: _serialize_list,
+    dict: _serialize_dict,
+    set: _serialize_set,
+    tuple: _serialize_tuple,
+    typing.Union: _serialize_union,
+}
+
+
 def serialize_type(t) -> dict:
     """
     Serializes a Python type to a JSON-compatible dict.
@@ -64,58 +126,14 @@ def serialize_type(t) -> dict:
     if t is Any:
         return {"type": "any"}
 
-    origin = get_origin(t)
-    args = get_args(t)
-
     # Handle basic types
-    type_map = {
-        int: "int",
-        float: "float",
-        bool: "bool",
-        str: "str",
-        bytes: "bytes",
-        list: "list",
-        dict: "dict",
-        set: "set",
-        tuple: "tuple",
-    }
-
-    if t in type_map:
-        return {"type": type_map[t]}
+    if t in _TYPE_MAP:
+        return {"type": _TYPE_MAP[t]}
 
     # Handle typing generics
-    if origin is list:
-        if args:
-            return {"type": "list", "element_type": serialize_type(args[0])}
-        return {"type": "list"}
-
-    if origin is dict:
-        if len(args) == 2:
-            return {
-                "type": "dict",
-                "key_type": serialize_type(args[0]),
-                "value_type": serialize_type(args[1])
-            }
-        return {"type": "dict"}
-
-    if origin is set:
-        if args:
-            return {"type": "set", "element_type": serialize_type(args[0])}
-        return {"type": "set"}
-
-    if origin is tuple:
-        if args:
-            if len(args) == 2 and args[1] is ...:
-                return {"type": "tuple", "element_type": serialize_type(args[0]), "variadic": True}
-            return {"type": "tuple", "element_types": [serialize_type(a) for a in args]}
-        return {"type": "tuple"}
-
-    if origin is typing.Union:
-        if len(args) == 2 and type(None) in args:
-            # Optional[T]
-            non_none = [a for a in args if a is not type(None)][0]
-            return {"type": "optional", "inner_type": serialize_type(non_none)}
-        return {"type": "union", "types": [serialize_type(a) for a in args]}
+    handler = _ORIGIN_HANDLERS.get(get_origin(t))
+    if handler is not None:
+        return handler(get_args(t))
 
     # Fallback: use class representation
     type_name = getattr(t, '__name__', str(t))
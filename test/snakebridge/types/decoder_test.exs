@@ -391,6 +391,43 @@ defmodule SnakeBridge.Types.DecoderTest do
     end
   end
 
+  describe "decode/1 compact containers" do
+    test "decodes compact tuples" do
+      assert Decoder.decode([<<0, "tuple">>, 1, [<<0, "tuple">>, 2, 3]]) == {1, {2, 3}}
+    end
+
+    test "decodes compact sets and frozensets" do
+      assert Decoder.decode([<<0, "set">>, 1, 2]) == MapSet.new([1, 2])
+      assert Decoder.decode([<<0, "frozenset">>]) == MapSet.new()
+    end
+
+    test "decodes compact scalar forms" do
+      assert Decoder.decode([<<0, "bytes">>, "aGk="]) == "hi"
+      assert Decoder.decode([<<0, "complex">>, 1.0, -2.0]) == %{real: 1.0, imag: -2.0}
+      assert Decoder.decode([<<0, "date">>, "2024-01-02"]) == ~D[2024-01-02]
+      assert Decoder.decode([<<0, "time">>, "03:04:00"]) == ~T[03:04:00]
+      assert Decoder.decode([<<0, "datetime">>, "2024-01-02T03:04:05Z"]) ==
+               ~U[2024-01-02 03:04:05Z]
+    end
+
+    test "leaves ordinary string-headed lists alone" do
+      assert Decoder.decode(["tuple", 1]) == ["tuple", 1]
+    end
+
+    test "keeps malformed compact scalar lists as plain lists" do
+      assert Decoder.decode([<<0, "bytes">>, "aGk=", "x"]) == [<<0, "bytes">>, "aGk=", "x"]
+      assert Decoder.decode([<<0, "bytes">>]) == [<<0, "bytes">>]
+      assert Decoder.decode([<<0, "complex">>, "1", 2]) == [<<0, "complex">>, "1", 2]
+      assert Decoder.decode(%{"k" => [<<0, "date">>, "bad"]}) == %{"k" => [<<0, "date">>, "bad"]}
+    end
+
+    test "unescapes lists led by a marker string" do
+      assert Decoder.decode([<<0, "list">>, <<0, "set">>, [1]]) == [<<0, "set">>, [1]]
+      assert Decoder.decode([<<0, "list">>, <<0, "list">>]) == [<<0, "list">>]
+      assert Decoder.decode([<<0, "list">>]) == []
+    end
+  end
+
   describe "decode/1 nested structures" do
     test "decodes list with tuples" do
       assert Decoder.decode([
@@ -41,6 +41,15 @@ defmodule SnakeBridge.Types.EncoderTest do
       assert Encoder.encode([1, 2, 3]) == [1, 2, 3]
     end
 
+    test "escapes lists led by a compact marker string" do
+      assert Encoder.encode([<<0, "set">>, [1]]) == [<<0, "list">>, <<0, "set">>, [1]]
+      assert Encoder.encode([<<0, "list">>]) == [<<0, "list">>, <<0, "list">>]
+      assert Encoder.encode(["set", 1]) == ["set", 1]
+
+      value = [<<0, "tuple">>, 1]
+      assert value |> Encoder.encode() |> SnakeBridge.Types.Decoder.decode() == value
+    end
+
     test "encodes maps with string keys" do
       assert Encoder.encode(%{"a" => 1}) == %{"a" => 1}
       assert Encoder.encode(%{"x" => "y"}) == %{"x" => "y"}